@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ModelJSONResponse(JSONResponse):
+    """JSONResponse that encodes pydantic models straight to bytes.
+
+    Returning one of these from a route bypasses FastAPI's response_model
+    round trip (model -> dict -> json.dumps) in favour of a single
+    pydantic-core serialisation pass. Use it for the large list payloads.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return super().render(content)
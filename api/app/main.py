@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.exception_handlers import http_exception_handler
@@ -31,6 +33,7 @@ from app.routes import (
     webhooks,
     uploads,
 )
+from app.services.discord import close_http_client as close_discord_http_client
 
 logger = logging.getLogger("app.main")
 
@@ -53,7 +56,14 @@ settings = get_settings()
 _prepare_sqlite_defaults(settings.app_env)
 configure_logging(settings)
 
-app = FastAPI(title="GridBoss API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    await close_discord_http_client()
+
+
+app = FastAPI(title="GridBoss API", version="0.1.0", lifespan=lifespan)
 
 
 @app.exception_handler(FastAPIHTTPException)
@@ -216,6 +216,7 @@ async def create_checkout_session(
             action="plan_checkout",
             before=before_billing,
             after=after_billing,
+            flush=False,
         )
 
     for league in leagues:
@@ -231,6 +232,7 @@ async def create_checkout_session(
                 action="plan_checkout",
                 before=before_state,
                 after=after_state,
+                flush=False,
             )
 
     session.commit()
@@ -9,17 +9,24 @@ from sqlalchemy.orm import Session, joinedload
 
 from app.core.errors import api_error
 from app.core.observability import bind_league_id
+from app.core.settings import Settings, get_settings
 from app.db.models import Driver, League, LeagueRole, Team, User
 from app.db.session import get_session
 from app.dependencies.auth import get_current_user
 from app.schemas.drivers import DriverBulkCreate, DriverRead, DriverUpdate
 from app.services.plan import effective_driver_limit, get_billing_account_for_owner
 from app.services.rbac import require_membership, require_role_at_least
+from app.services.standings import (
+    StandingsCacheConfig,
+    get_standings_cache,
+    invalidate_league_standings,
+)
 
 router = APIRouter(tags=["drivers"])
 
 SessionDep = Annotated[Session, Depends(get_session)]
 CurrentUserDep = Annotated[User, Depends(get_current_user)]
+SettingsDep = Annotated[Settings, Depends(get_settings)]
 
 
 def _get_league(league_id: UUID, session: SessionDep) -> League:
@@ -34,6 +41,11 @@ def _get_league(league_id: UUID, session: SessionDep) -> League:
     return league
 
 
+def _invalidate_standings(session: Session, settings: Settings, league_id: UUID) -> None:
+    cache = get_standings_cache(StandingsCacheConfig(redis_url=settings.redis_url))
+    invalidate_league_standings(session, cache, league_id=league_id)
+
+
 def _driver_to_read(driver: Driver) -> DriverRead:
     return DriverRead(
         id=driver.id,
@@ -78,6 +90,7 @@ async def bulk_create_drivers(
     payload: DriverBulkCreate,
     session: SessionDep,
     current_user: CurrentUserDep,
+    settings: SettingsDep,
 ) -> list[DriverRead]:
     league = _get_league(league_id, session)
     membership = require_membership(session, league_id=league_id, user_id=current_user.id)
@@ -155,6 +168,7 @@ async def bulk_create_drivers(
     ]
     session.add_all(drivers_to_create)
     session.commit()
+    _invalidate_standings(session, settings, league_id)
 
     created_driver_ids = [driver.id for driver in drivers_to_create]
     created_drivers = (
@@ -174,6 +188,7 @@ async def update_driver(
     payload: DriverUpdate,
     session: SessionDep,
     current_user: CurrentUserDep,
+    settings: SettingsDep,
 ) -> DriverRead:
     driver = session.get(Driver, driver_id)
     if driver is None:
@@ -230,7 +245,10 @@ async def update_driver(
                 )
         driver.team_id = team_id
 
+    name_changed = "display_name" in update_data
     session.commit()
+    if name_changed:
+        _invalidate_standings(session, settings, driver.league_id)
     session.refresh(driver)
     return _driver_to_read(driver)
 
@@ -242,6 +260,7 @@ async def delete_driver(
     driver_id: UUID,
     session: SessionDep,
     current_user: CurrentUserDep,
+    settings: SettingsDep,
 ) -> Response:
     driver = session.get(Driver, driver_id)
     if driver is None:
@@ -254,6 +273,8 @@ async def delete_driver(
     membership = require_membership(session, league_id=driver.league_id, user_id=current_user.id)
     require_role_at_least(membership, minimum=LeagueRole.ADMIN)
 
+    league_id = driver.league_id
     session.delete(driver)
     session.commit()
+    _invalidate_standings(session, settings, league_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
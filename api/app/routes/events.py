@@ -10,11 +10,13 @@ from sqlalchemy.orm import Session
 
 from app.core.errors import api_error
 from app.core.observability import bind_league_id
+from app.core.settings import Settings, get_settings
 from app.db.models import Event, EventStatus, League, LeagueRole, Season, User
 from app.db.session import get_session
 from app.dependencies.auth import get_current_user
 from app.schemas.events import EventCreate, EventRead, EventUpdate
 from app.services.rbac import require_membership, require_role_at_least
+from app.services.standings import StandingsCacheConfig, get_standings_cache
 
 try:
     from zoneinfo import ZoneInfo
@@ -25,6 +27,7 @@ router = APIRouter(tags=["events"])
 
 SessionDep = Annotated[Session, Depends(get_session)]
 CurrentUserDep = Annotated[User, Depends(get_current_user)]
+SettingsDep = Annotated[Settings, Depends(get_settings)]
 
 
 STATUS_LOOKUP = {item.value: item for item in EventStatus}
@@ -230,6 +233,7 @@ async def update_event(
     payload: EventUpdate,
     session: SessionDep,
     current_user: CurrentUserDep,
+    settings: SettingsDep,
 ) -> EventRead:
     event = session.get(Event, event_id)
     if event is None:
@@ -245,6 +249,7 @@ async def update_event(
     update_data = payload.model_dump(exclude_unset=True)
 
     is_completed = event.status == EventStatus.COMPLETED.value
+    previous_season_id = event.season_id
 
     if "name" in update_data and update_data["name"] is not None:
         if is_completed:
@@ -324,6 +329,15 @@ async def update_event(
 
     session.commit()
     session.refresh(event)
+
+    # Only completed events count towards standings, so only they can make a cached table stale.
+    if event.status == EventStatus.COMPLETED.value and (
+        not is_completed or event.season_id != previous_season_id
+    ):
+        cache = get_standings_cache(StandingsCacheConfig(redis_url=settings.redis_url))
+        cache.invalidate_many(
+            [(event.league_id, previous_season_id), (event.league_id, event.season_id)]
+        )
     return _event_to_read(event)
 
 
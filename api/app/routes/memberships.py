@@ -13,6 +13,7 @@ from app.db.session import get_session
 from app.dependencies.auth import get_current_user
 from app.schemas.memberships import MembershipCreate, MembershipRead, MembershipUpdate
 from app.services.email import queue_transactional_email
+from app.services.rbac import ROLE_PRIORITY
 
 router = APIRouter(prefix="/leagues/{league_id}/memberships", tags=["memberships"])
 
@@ -20,13 +21,6 @@ SessionDep = Annotated[Session, Depends(get_session)]
 CurrentUserDep = Annotated[User, Depends(get_current_user)]
 SettingsDep = Annotated[Settings, Depends(get_settings)]
 
-ROLE_PRIORITY = {
-    LeagueRole.DRIVER: 1,
-    LeagueRole.STEWARD: 2,
-    LeagueRole.ADMIN: 3,
-    LeagueRole.OWNER: 4,
-}
-
 
 def _require_membership(session: Session, league_id: UUID, user_id: UUID) -> Membership:
     membership = session.execute(
@@ -5,11 +5,12 @@ import logging
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Header, status
+from fastapi import APIRouter, Depends, Header, Response, status
 from sqlalchemy import delete, select
 from sqlalchemy.orm import Session, joinedload
 
 from app.core.errors import api_error
+from app.core.responses import ModelJSONResponse
 from app.core.settings import Settings, get_settings
 from app.db.models import (
     Driver,
@@ -187,7 +188,7 @@ async def submit_results(
     idempotency_key: str | None = Header(
         default=None, alias="Idempotency-Key", convert_underscores=False
     ),
-) -> EventResultsRead:
+) -> Response:
     try:
         event = _load_event(session, event_id)
     except ResultsError as exc:
@@ -246,19 +247,20 @@ async def submit_results(
         .all()
     )
 
-    payload_hash = _serialize_payload(
-        [
-            {
-                "driver_id": str(item.driver_id),
-                "finish_position": item.finish_position,
-                "bonus_points": item.bonus_points,
-                "penalty_points": item.penalty_points,
-            }
-            for item in sorted(entries, key=lambda entry: entry.driver_id)
-        ]
-    )
-
     idem_service = get_idempotency_service(IdempotencyConfig(redis_url=settings.redis_url))
+    payload_hash = idem_service.hash_payload(
+        _serialize_payload(
+            [
+                {
+                    "driver_id": str(item.driver_id),
+                    "finish_position": item.finish_position,
+                    "bonus_points": item.bonus_points,
+                    "penalty_points": item.penalty_points,
+                }
+                for item in sorted(entries, key=lambda entry: entry.driver_id)
+            ]
+        )
+    )
 
     idem_status: str | None = None
     if idempotency_key:
@@ -266,7 +268,9 @@ async def submit_results(
             scope=f"{IDEMPOTENCY_SCOPE}:{event_id}", key=idempotency_key, payload_hash=payload_hash
         )
         if idem_status == "duplicate":
-            return _build_response(event, existing_results)
+            return ModelJSONResponse(
+                _build_response(event, existing_results), status_code=status.HTTP_201_CREATED
+            )
         if idem_status == "conflict":
 
             raise api_error(
@@ -315,6 +319,7 @@ async def submit_results(
                 action="results_submitted",
                 before=before_state,
                 after=after_state,
+                flush=False,
             )
 
         session.commit()
@@ -338,7 +343,9 @@ async def submit_results(
     _trigger_standings_jobs(event)
     _queue_results_summary_email(session, event, refreshed_results, settings)
 
-    return _build_response(event, refreshed_results)
+    return ModelJSONResponse(
+        _build_response(event, refreshed_results), status_code=status.HTTP_201_CREATED
+    )
 
 
 def _trigger_standings_jobs(event: Event) -> None:
@@ -428,7 +435,7 @@ async def read_results(
     event_id: UUID,
     session: SessionDep,
     current_user: CurrentUserDep,
-) -> EventResultsRead:
+) -> Response:
     event = session.get(Event, event_id)
     if event is None:
 
@@ -447,4 +454,4 @@ async def read_results(
         .scalars()
         .all()
     )
-    return _build_response(event, results)
+    return ModelJSONResponse(_build_response(event, results))
@@ -3,12 +3,13 @@
 from typing import Annotated, Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.errors import api_error
 from app.core.observability import bind_league_id
+from app.core.responses import ModelJSONResponse
 from app.core.settings import Settings, get_settings
 from app.db.models import League, Season, User
 from app.db.session import get_session
@@ -115,7 +116,7 @@ async def read_standings(
     current_user: CurrentUserDep,
     settings: SettingsDep,
     season_id: UUID | None = Query(default=None, alias="seasonId"),
-) -> SeasonStandingsRead:
+) -> Response:
     _get_league(session, league_id)
     require_membership(session, league_id=league_id, user_id=current_user.id)
 
@@ -128,9 +129,11 @@ async def read_standings(
     cache = get_standings_cache(StandingsCacheConfig(redis_url=settings.redis_url))
     cached_payload = cache.get(league_id=league_id, season_id=resolved_season_id)
     if cached_payload is not None:
-        return _deserialize_payload(cached_payload)
+        return ModelJSONResponse(_deserialize_payload(cached_payload))
 
-    raw_items = calculate_standings(
+    # Read before computing: an invalidation that lands mid-compute makes the fill a no-op.
+    generation = cache.generation(league_id=league_id, season_id=resolved_season_id)
+    rows = calculate_standings(
         session,
         league_id=league_id,
         season_id=resolved_season_id,
@@ -138,11 +141,21 @@ async def read_standings(
     response = SeasonStandingsRead(
         league_id=league_id,
         season_id=resolved_season_id,
-        items=[StandingsItem(**item) for item in raw_items],
+        items=[
+            StandingsItem(
+                driver_id=row.driver_id,
+                display_name=row.display_name,
+                points=row.points,
+                wins=row.wins,
+                best_finish=row.best_finish,
+            )
+            for row in rows
+        ],
     )
     cache.set(
         league_id=league_id,
         season_id=resolved_season_id,
         payload=_serialize_response(response),
+        generation=generation,
     )
-    return response
+    return ModelJSONResponse(response)
@@ -105,6 +105,7 @@ def _update_leagues_for_plan(session: Session, billing_account: BillingAccount,
             action="plan_sync",
             before=before_account_state,
             after=after_account_state,
+            flush=False,
         )
 
     for league in leagues:
@@ -120,6 +121,7 @@ def _update_leagues_for_plan(session: Session, billing_account: BillingAccount,
                 action="plan_sync",
                 before=before_state,
                 after=after_state,
+                flush=False,
             )
 
 
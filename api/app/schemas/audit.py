@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from app.services.audit import redact_sensitive_data
 
@@ -20,8 +20,7 @@ class AuditLogRead(BaseModel):
     before_state: Any | None
     after_state: Any | None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
     @classmethod
     def from_orm_with_redaction(cls, log: Any) -> AuditLogRead:  # type: ignore[override]
@@ -45,8 +44,7 @@ class AuditLogPage(BaseModel):
     page_size: int
     total: int
 
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 
 __all__ = ["AuditLogRead", "AuditLogPage"]
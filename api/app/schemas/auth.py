@@ -3,7 +3,7 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from app.db.models import LeagueRole
 
@@ -16,8 +16,7 @@ class UserOut(BaseModel):
     email: str | None
     is_founder: bool
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class MembershipOut(BaseModel):
@@ -2,7 +2,7 @@
 
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class DiscordLinkRequest(BaseModel):
@@ -18,5 +18,4 @@ class DiscordIntegrationRead(BaseModel):
     installed_by_user: UUID | None
     is_active: bool
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
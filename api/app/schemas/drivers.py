@@ -2,10 +2,12 @@ from __future__ import annotations
 
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic.dataclasses import dataclass
 
 
-class DriverCreateItem(BaseModel):
+@dataclass(frozen=True, slots=True)
+class DriverCreateItem:
     display_name: str = Field(min_length=1)
     team_id: UUID | None = None
 
@@ -28,5 +30,4 @@ class DriverRead(BaseModel):
     team_id: UUID | None
     team_name: str | None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from app.db.models import EventStatus
 
@@ -38,5 +38,4 @@ class EventRead(BaseModel):
     distance_km: float | None
     status: EventStatus
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
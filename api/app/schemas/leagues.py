@@ -3,7 +3,7 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class LeagueCreate(BaseModel):
@@ -26,5 +26,4 @@ class LeagueRead(BaseModel):
     is_deleted: bool
     deleted_at: datetime | None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
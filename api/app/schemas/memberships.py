@@ -2,7 +2,7 @@
 
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from app.db.models import LeagueRole
 
@@ -22,5 +22,4 @@ class MembershipRead(BaseModel):
     user_id: UUID
     role: LeagueRole
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic.dataclasses import dataclass
 
 
-class PointsRuleInput(BaseModel):
+@dataclass(frozen=True, slots=True)
+class PointsRuleInput:
     position: int = Field(gt=0)
     points: int = Field(ge=0)
 
@@ -15,8 +17,7 @@ class PointsRuleRead(BaseModel):
     position: int
     points: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PointsSchemeCreate(BaseModel):
@@ -41,5 +42,4 @@ class PointsSchemeRead(BaseModel):
     is_default: bool
     rules: list[PointsRuleRead]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
@@ -3,11 +3,13 @@ from __future__ import annotations
 from uuid import UUID
 
 from pydantic import BaseModel, Field
+from pydantic.dataclasses import dataclass
 
 from app.db.models import ResultStatus
 
 
-class ResultEntryCreate(BaseModel):
+@dataclass(frozen=True, slots=True)
+class ResultEntryCreate:
     driver_id: UUID
     finish_position: int = Field(gt=0)
     started_position: int | None = Field(default=None, ge=1)
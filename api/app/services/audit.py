@@ -38,6 +38,7 @@ def record_audit_log(
     entity_id: str | None = None,
     before: Mapping[str, Any] | None = None,
     after: Mapping[str, Any] | None = None,
+    flush: bool = True,
 ) -> AuditLog:
     log = AuditLog(
         actor_id=actor_id,
@@ -49,7 +50,8 @@ def record_audit_log(
         after_state=_ensure_serialisable(after) if after is not None else None,
     )
     session.add(log)
-    session.flush()
+    if flush:
+        session.flush()
     return log
 
 
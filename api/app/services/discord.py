@@ -7,10 +7,33 @@ from app.core.settings import Settings
 TOKEN_URL = "https://discord.com/api/oauth2/token"  # noqa: S105
 USER_URL = "https://discord.com/api/users/@me"
 
+_http_client: httpx.AsyncClient | None = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client  # noqa: PLW0603 - shared connection pool
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=10.0, limits=httpx.Limits(max_keepalive_connections=20)
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client  # noqa: PLW0603 - shared connection pool
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 class DiscordOAuthClient:
-    def __init__(self, settings: Settings) -> None:
+    def __init__(self, settings: Settings, http_client: httpx.AsyncClient | None = None) -> None:
         self.settings = settings
+        self._client = http_client
+
+    @property
+    def _http(self) -> httpx.AsyncClient:
+        return self._client if self._client is not None else _get_http_client()
 
     async def exchange_code(
         self,
@@ -27,17 +50,15 @@ class DiscordOAuthClient:
             "code_verifier": code_verifier,
         }
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(TOKEN_URL, data=data, headers=headers)
-            response.raise_for_status()
-            return response.json()
+        response = await self._http.post(TOKEN_URL, data=data, headers=headers)
+        response.raise_for_status()
+        return response.json()
 
     async def fetch_user(self, *, access_token: str) -> dict[str, str]:
         headers = {"Authorization": f"Bearer {access_token}"}
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(USER_URL, headers=headers)
-            response.raise_for_status()
-            return response.json()
+        response = await self._http.get(USER_URL, headers=headers)
+        response.raise_for_status()
+        return response.json()
 
 
 def get_discord_client(settings: Settings) -> DiscordOAuthClient:
@@ -97,6 +97,7 @@ def queue_transactional_email(
                 "locale": resolved_locale,
                 **({"reason": reason} if reason else {}),
             },
+            flush=False,
         )
         session.commit()
     except Exception:  # pragma: no cover - logging should not break flow
@@ -3,31 +3,46 @@ from __future__ import annotations
 import hashlib
 import logging
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Literal
 
 import redis
+from redis.commands.core import Script
 
 logger = logging.getLogger("app.idempotency")
 
 IdempotencyResult = Literal["claimed", "duplicate", "conflict"]
 
+_CLAIM_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'EX', ARGV[2]) then
+    return 'claimed'
+end
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return 'duplicate'
+end
+return 'conflict'
+"""
+
 
 @dataclass
 class IdempotencyConfig:
     redis_url: str
     ttl_seconds: int = 600
+    max_memory_entries: int = 10_000
 
 
 class IdempotencyService:
     def __init__(self, config: IdempotencyConfig) -> None:
         self.config = config
         self._redis_client: redis.Redis | None = None
-        self._memory_store: dict[str, tuple[str, float]] = {}
+        self._claim_script: Script | None = None
+        self._memory_store: OrderedDict[str, tuple[str, float]] = OrderedDict()
 
         try:
             self._redis_client = redis.Redis.from_url(config.redis_url, decode_responses=True)
             self._redis_client.ping()
+            self._claim_script = self._redis_client.register_script(_CLAIM_SCRIPT)
         except Exception as exc:  # pragma: no cover - fallback path
             logger.warning("Idempotency Redis connection failed: %s -- using in-memory store", exc)
             self._redis_client = None
@@ -36,8 +51,10 @@ class IdempotencyService:
         return f"idempotency:{scope}:{key}".lower()
 
     @staticmethod
-    def _hash_payload(raw_payload: str) -> str:
-        return hashlib.sha256(raw_payload.encode("utf-8")).hexdigest()
+    def hash_payload(raw_payload: str | bytes) -> str:
+        if isinstance(raw_payload, str):
+            raw_payload = raw_payload.encode("utf-8")
+        return hashlib.sha256(raw_payload).hexdigest()
 
     def claim(self, *, scope: str, key: str, payload_hash: str) -> IdempotencyResult:
         storage_key = self._build_key(scope, key)
@@ -56,46 +73,38 @@ class IdempotencyService:
             self._memory_store.pop(storage_key, None)
 
     def _claim_redis(self, storage_key: str, payload_hash: str) -> IdempotencyResult:
-        assert self._redis_client is not None
+        assert self._claim_script is not None
         try:
-            was_created = self._redis_client.set(
-                storage_key,
-                payload_hash,
-                nx=True,
-                ex=self.config.ttl_seconds,
+            result = self._claim_script(
+                keys=[storage_key], args=[payload_hash, self.config.ttl_seconds]
             )
         except redis.RedisError as exc:  # pragma: no cover
             logger.warning("Redis error recording idempotency: %s", exc)
             return self._claim_memory(storage_key, payload_hash)
-
-        if was_created:
-            return "claimed"
-
-        try:
-            existing = self._redis_client.get(storage_key)
-        except redis.RedisError as exc:  # pragma: no cover
-            logger.warning("Redis error fetching idempotency: %s", exc)
-            return self._claim_memory(storage_key, payload_hash)
-
-        if existing == payload_hash:
-            return "duplicate"
-        return "conflict"
+        return result
 
     def _claim_memory(self, storage_key: str, payload_hash: str) -> IdempotencyResult:
-        now = time.time()
+        now = time.monotonic()
+        self._evict_expired(now)
         record = self._memory_store.get(storage_key)
-        if record is None or record[1] < now:
+        if record is None:
             self._memory_store[storage_key] = (payload_hash, now + self.config.ttl_seconds)
+            if len(self._memory_store) > self.config.max_memory_entries:
+                self._memory_store.popitem(last=False)
             return "claimed"
-
-        existing_hash, expires_at = record
-        if expires_at < now:
-            self._memory_store[storage_key] = (payload_hash, now + self.config.ttl_seconds)
-            return "claimed"
-        if existing_hash == payload_hash:
+        if record[0] == payload_hash:
             return "duplicate"
         return "conflict"
 
+    def _evict_expired(self, now: float) -> None:
+        # Every entry shares one TTL, so insertion order is also expiry order.
+        store = self._memory_store
+        while store:
+            oldest_key = next(iter(store))
+            if store[oldest_key][1] > now:
+                break
+            del store[oldest_key]
+
 
 _service_cache: IdempotencyService | None = None
 
@@ -9,9 +9,10 @@ from app.db.models import BillingAccount, League
 
 PLAN_DRIVER_LIMITS: Final[dict[str, int]] = {"FREE": 20, "PRO": 100, "ELITE": 9999}
 PLAN_LEAGUE_LIMITS: Final[dict[str, int | None]] = {"FREE": 1, "PRO": None, "ELITE": None}
-_PLAN_ORDER: Final[tuple[str, ...]] = ("FREE", "PRO", "ELITE")
+_PLAN_RANK: Final[dict[str, int]] = {"FREE": 0, "PRO": 1, "ELITE": 2}
 DEFAULT_PLAN: Final[str] = "FREE"
 GRACE_PERIOD_DAYS: Final[int] = 7
+_BILLING_CACHE_KEY: Final[str] = "plan.billing_accounts"
 
 
 def normalize_plan(plan: str | None) -> str:
@@ -21,11 +22,7 @@ def normalize_plan(plan: str | None) -> str:
 
 
 def _plan_rank(plan: str | None) -> int:
-    normalized = normalize_plan(plan)
-    try:
-        return _PLAN_ORDER.index(normalized)
-    except ValueError:
-        return _PLAN_ORDER.index(DEFAULT_PLAN)
+    return _PLAN_RANK.get(normalize_plan(plan), _PLAN_RANK[DEFAULT_PLAN])
 
 
 def is_plan_sufficient(current: str | None, required: str) -> bool:
@@ -34,10 +31,12 @@ def is_plan_sufficient(current: str | None, required: str) -> bool:
 
 def _max_plan(*plans: str | None) -> str:
     best = DEFAULT_PLAN
+    best_rank = _PLAN_RANK[DEFAULT_PLAN]
     for plan in plans:
         normalized = normalize_plan(plan)
-        if _plan_rank(normalized) > _plan_rank(best):
-            best = normalized
+        rank = _PLAN_RANK.get(normalized, _PLAN_RANK[DEFAULT_PLAN])
+        if rank > best_rank:
+            best, best_rank = normalized, rank
     return best
 
 
@@ -100,11 +99,19 @@ def get_billing_account_for_owner(
     session: Session,
     owner_id: UUID,
 ) -> BillingAccount | None:
-    return (
-        session.execute(select(BillingAccount).where(BillingAccount.owner_user_id == owner_id))
-        .scalars()
-        .first()
-    )
+    # Session.info lives exactly as long as the request's session, so it doubles as a
+    # request-scoped cache. Misses are not cached because checkout may create the account.
+    cache: dict[UUID, BillingAccount] = session.info.setdefault(_BILLING_CACHE_KEY, {})
+    billing_account = cache.get(owner_id)
+    if billing_account is None:
+        billing_account = (
+            session.execute(select(BillingAccount).where(BillingAccount.owner_user_id == owner_id))
+            .scalars()
+            .first()
+        )
+        if billing_account is not None:
+            cache[owner_id] = billing_account
+    return billing_account
 
 
 __all__ = [
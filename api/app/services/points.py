@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from collections.abc import Iterable
+from operator import itemgetter
 
 DEFAULT_F1_POINTS: dict[int, int] = {
     1: 25,
@@ -14,24 +15,22 @@ DEFAULT_F1_POINTS: dict[int, int] = {
     9: 2,
     10: 1,
 }
+_DEFAULT_F1_ENTRIES: tuple[tuple[int, int], ...] = tuple(sorted(DEFAULT_F1_POINTS.items()))
 
 
 def default_points_entries() -> list[tuple[int, int]]:
     """Return the default F1 points mapping as (position, points) pairs."""
-    return sorted(DEFAULT_F1_POINTS.items(), key=lambda item: item[0])
+    return list(_DEFAULT_F1_ENTRIES)
 
 
 def normalize_points_entries(entries: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
     """Normalize user-provided point entries, ensuring sorted unique positions."""
-    seen: set[int] = set()
-    normalized: list[tuple[int, int]] = []
+    seen: dict[int, int] = {}
     for position, points in entries:
         if position in seen:
             raise ValueError("Duplicate position in points map")
-        seen.add(position)
-        normalized.append((position, points))
-    normalized.sort(key=lambda item: item[0])
-    return normalized
+        seen[position] = points
+    return sorted(seen.items(), key=itemgetter(0))
 
 
 def build_points_map(entries: Iterable[tuple[int, int]]) -> dict[int, int]:
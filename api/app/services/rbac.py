@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from typing import Final
 from uuid import UUID
 
 from fastapi import status
@@ -9,7 +10,7 @@ from sqlalchemy.orm import Session
 from app.core.errors import api_error
 from app.db.models import LeagueRole, Membership
 
-ROLE_PRIORITY = {
+ROLE_PRIORITY: Final[dict[LeagueRole, int]] = {
     LeagueRole.DRIVER: 1,
     LeagueRole.STEWARD: 2,
     LeagueRole.ADMIN: 3,
@@ -31,9 +32,7 @@ def require_membership(session: Session, *, league_id: UUID, user_id: UUID) -> M
 
 
 def require_role_at_least(membership: Membership, *, minimum: LeagueRole) -> None:
-    required_rank = ROLE_PRIORITY[minimum]
-    actual_rank = ROLE_PRIORITY[membership.role]
-    if actual_rank < required_rank:
+    if ROLE_PRIORITY[membership.role] < ROLE_PRIORITY[minimum]:
         raise api_error(
             status_code=status.HTTP_403_FORBIDDEN,
             code="INSUFFICIENT_ROLE",
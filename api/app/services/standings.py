@@ -1,100 +1,327 @@
 ﻿from __future__ import annotations
 
-import json
 import logging
 import time
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass
-from typing import Any
+from functools import lru_cache
+from typing import Any, NamedTuple
 from uuid import UUID
 
+import orjson
 import redis
-from sqlalchemy import and_, case, func, select
+from sqlalchemy import and_, case, func, join, select
 from sqlalchemy.orm import Session
 
-from app.db.models import Driver, Event, EventStatus, Result
+from app.db.models import Driver, Event, EventStatus, Result, Season
 
 logger = logging.getLogger("app.standings")
 
+# Drivers without a classified finish sort after every real finishing position.
+_NO_FINISH_RANK = 1_000_000
+
+
+class StandingsRow(NamedTuple):
+    driver_id: UUID
+    display_name: str
+    points: int
+    wins: int
+    best_finish: int | None
+
+
+@lru_cache(maxsize=4096)
+def _build_key(league_id: UUID, season_id: UUID | None) -> str:
+    season_part = str(season_id) if season_id is not None else "none"
+    return f"standings:{league_id}:{season_part}".lower()
+
+
+@lru_cache(maxsize=4096)
+def _build_generation_key(league_id: UUID, season_id: UUID | None) -> str:
+    season_part = str(season_id) if season_id is not None else "none"
+    return f"standings-generation:{league_id}:{season_part}".lower()
+
+
+# Generation counters must outlive any in-flight recompute: if one expired mid-compute,
+# a fill started before an invalidation would compare equal to a fresh "0" again.
+_GENERATION_TTL_SECONDS = 86_400
+
+# KEYS: entry, generation counter. ARGV: payload, TTL, generation read before computing.
+_GUARDED_SET_SCRIPT = """
+if (redis.call("GET", KEYS[2]) or "0") == ARGV[3] then
+    redis.call("SET", KEYS[1], ARGV[1], "EX", ARGV[2])
+    return 1
+end
+return 0
+"""
+
 
 @dataclass
 class StandingsCacheConfig:
     redis_url: str
+    # Writes that change standings invalidate explicitly; the TTL bounds how long a fill
+    # computed before such a write can still be served if it lands after the invalidation.
     ttl_seconds: int = 300
+    # Per-process tier in front of Redis. Other processes' invalidations cannot reach it,
+    # so keep its lifetime short enough that bounded staleness is acceptable.
+    l1_ttl_seconds: float = 5.0
+    l1_max_entries: int = 256
+    # After a Redis failure, serve from the in-process store and retry Redis with
+    # exponential backoff instead of paying a failed round trip on every request.
+    redis_retry_initial_seconds: float = 1.0
+    redis_retry_max_seconds: float = 60.0
 
 
 class StandingsCache:
     def __init__(self, config: StandingsCacheConfig) -> None:
         self.config = config
         self._redis_client: redis.Redis | None = None
-        self._memory_store: dict[str, tuple[str, float]] = {}
+        self._memory_store: dict[str, tuple[bytes, float]] = {}
+        self._memory_generations: dict[str, int] = {}
+        self._l1: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+        self._next_probe_at = 0.0
+        self._retry_delay = 0.0
         try:
-            self._redis_client = redis.Redis.from_url(config.redis_url, decode_responses=True)
-            self._redis_client.ping()
+            # No PING here: the connection is established lazily by the first command.
+            self._redis_client = redis.Redis.from_url(config.redis_url)
+            self._guarded_set = self._redis_client.register_script(_GUARDED_SET_SCRIPT)
         except Exception as exc:  # pragma: no cover - fallback path
-            logger.warning(
-                "Standings cache Redis connection failed: %s -- using in-memory cache", exc
-            )
+            logger.warning("Standings cache Redis URL invalid: %s -- using in-memory cache", exc)
             self._redis_client = None
 
-    def _build_key(self, league_id: UUID, season_id: UUID | None) -> str:
-        season_part = str(season_id) if season_id is not None else "none"
-        return f"standings:{league_id}:{season_part}".lower()
+    def _redis(self) -> redis.Redis | None:
+        """Return the Redis client unless it is backing off after a failure."""
+        if self._redis_client is None or time.monotonic() < self._next_probe_at:
+            return None
+        return self._redis_client
 
-    def get(self, *, league_id: UUID, season_id: UUID | None) -> dict[str, Any] | None:
-        key = self._build_key(league_id, season_id)
-        raw_payload: str | None
-        if self._redis_client is not None:
-            try:
-                raw_payload = self._redis_client.get(key)
-            except redis.RedisError as exc:  # pragma: no cover - treat as cache miss
-                logger.warning("Redis error fetching standings cache: %s", exc)
-                raw_payload = None
+    def _redis_succeeded(self) -> None:
+        self._retry_delay = 0.0
+        self._next_probe_at = 0.0
+
+    def _redis_failed(self, action: str, exc: redis.RedisError) -> None:
+        self._retry_delay = min(
+            self._retry_delay * 2 or self.config.redis_retry_initial_seconds,
+            self.config.redis_retry_max_seconds,
+        )
+        self._next_probe_at = time.monotonic() + self._retry_delay
+        logger.warning(
+            "Redis error %s standings cache: %s -- retrying in %.0fs",
+            action,
+            exc,
+            self._retry_delay,
+        )
+
+    def _l1_get(self, key: str) -> dict[str, Any] | None:
+        record = self._l1.get(key)
+        if record is None:
+            return None
+        payload, expires_at = record
+        if expires_at < time.monotonic():
+            del self._l1[key]
+            return None
+        self._l1.move_to_end(key)
+        return payload
+
+    def _l1_put(self, key: str, payload: dict[str, Any]) -> None:
+        lifetime = min(self.config.l1_ttl_seconds, self.config.ttl_seconds)
+        self._l1[key] = (payload, time.monotonic() + lifetime)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.config.l1_max_entries:
+            self._l1.popitem(last=False)
+
+    def _l1_store_result(self, key: str, payload: dict[str, Any], *, stored: bool) -> None:
+        if stored:
+            self._l1_put(key, payload)
         else:
-            record = self._memory_store.get(key)
-            if record is None:
-                raw_payload = None
-            else:
-                cached_value, expires_at = record
-                if expires_at < time.time():
-                    self._memory_store.pop(key, None)
-                    raw_payload = None
-                else:
-                    raw_payload = cached_value
+            self._l1.pop(key, None)
+
+    def _memory_get(self, key: str) -> bytes | None:
+        record = self._memory_store.get(key)
+        if record is None:
+            return None
+        cached_value, expires_at = record
+        if expires_at < time.time():
+            self._memory_store.pop(key, None)
+            return None
+        return cached_value
+
+    def _decode(self, key: str, raw_payload: bytes | None) -> dict[str, Any] | None:
         if raw_payload is None:
             return None
         try:
-            return json.loads(raw_payload)
-        except json.JSONDecodeError:
+            payload = orjson.loads(raw_payload)
+        except orjson.JSONDecodeError:
             logger.warning("Invalid standings cache payload for %s", key)
-            self.invalidate(league_id=league_id, season_id=season_id)
+            self._delete_keys([key])
             return None
+        self._l1_put(key, payload)
+        return payload
 
-    def set(self, *, league_id: UUID, season_id: UUID | None, payload: dict[str, Any]) -> None:
-        key = self._build_key(league_id, season_id)
-        raw_payload = json.dumps(payload)
+    def _delete_keys(self, keys: list[str], generation_keys: Sequence[str] = ()) -> None:
+        # Deletes bypass the backoff window: a skipped invalidation would leave a stale
+        # entry in Redis once it recovers.
         if self._redis_client is not None:
             try:
-                self._redis_client.setex(key, self.config.ttl_seconds, raw_payload)
+                with self._redis_client.pipeline(transaction=False) as pipe:
+                    pipe.delete(*keys)
+                    for generation_key in generation_keys:
+                        pipe.incr(generation_key)
+                        pipe.expire(generation_key, _GENERATION_TTL_SECONDS)
+                    pipe.execute()
+            except redis.RedisError as exc:
+                self._redis_failed("deleting", exc)
+            else:
+                self._redis_succeeded()
+        for key in keys:
+            self._memory_store.pop(key, None)
+            self._l1.pop(key, None)
+        for generation_key in generation_keys:
+            self._memory_generations[generation_key] = (
+                self._memory_generations.get(generation_key, 0) + 1
+            )
+
+    def get(self, *, league_id: UUID, season_id: UUID | None) -> dict[str, Any] | None:
+        key = _build_key(league_id, season_id)
+        cached = self._l1_get(key)
+        if cached is not None:
+            return cached
+        raw_payload: bytes | None
+        client = self._redis()
+        if client is not None:
+            try:
+                raw_payload = client.get(key)
+            except redis.RedisError as exc:
+                self._redis_failed("fetching", exc)
+                raw_payload = self._memory_get(key)
+            else:
+                self._redis_succeeded()
+        else:
+            raw_payload = self._memory_get(key)
+        return self._decode(key, raw_payload)
+
+    def get_many(
+        self, scopes: Sequence[tuple[UUID, UUID | None]]
+    ) -> dict[tuple[UUID, UUID | None], dict[str, Any] | None]:
+        """Fetch several (league_id, season_id) entries in one Redis round trip."""
+        results: dict[tuple[UUID, UUID | None], dict[str, Any] | None] = {}
+        missing: dict[str, tuple[UUID, UUID | None]] = {}
+        for league_id, season_id in scopes:
+            key = _build_key(league_id, season_id)
+            results[(league_id, season_id)] = self._l1_get(key)
+            if results[(league_id, season_id)] is None:
+                missing[key] = (league_id, season_id)
+        if not missing:
+            return results
+
+        keys = list(missing)
+        raw_payloads: list[bytes | None]
+        client = self._redis()
+        if client is not None:
+            try:
+                raw_payloads = client.mget(keys)
+            except redis.RedisError as exc:
+                self._redis_failed("fetching", exc)
+                raw_payloads = [self._memory_get(key) for key in keys]
+            else:
+                self._redis_succeeded()
+        else:
+            raw_payloads = [self._memory_get(key) for key in keys]
+        for key, raw_payload in zip(keys, raw_payloads, strict=True):
+            results[missing[key]] = self._decode(key, raw_payload)
+        return results
+
+    def generation(self, *, league_id: UUID, season_id: UUID | None) -> int:
+        """Return the scope's invalidation counter; read it before computing a fill."""
+        generation_key = _build_generation_key(league_id, season_id)
+        client = self._redis()
+        if client is not None:
+            try:
+                raw_generation = client.get(generation_key)
+            except redis.RedisError as exc:
+                self._redis_failed("fetching", exc)
+            else:
+                self._redis_succeeded()
+                return int(raw_generation or 0)
+        return self._memory_generations.get(generation_key, 0)
+
+    def set(
+        self,
+        *,
+        league_id: UUID,
+        season_id: UUID | None,
+        payload: dict[str, Any],
+        generation: int | None = None,
+    ) -> None:
+        generations = None if generation is None else {(league_id, season_id): generation}
+        self.set_many({(league_id, season_id): payload}, generations=generations)
+
+    def set_many(
+        self,
+        payloads: Mapping[tuple[UUID, UUID | None], dict[str, Any]],
+        *,
+        generations: Mapping[tuple[UUID, UUID | None], int] | None = None,
+    ) -> None:
+        """Store several entries, pipelining the writes into one round trip.
+
+        A scope listed in ``generations`` is only written if it has not been invalidated
+        since that generation was read, so a fill computed before a standings write
+        cannot land after the write's invalidation and be served until the TTL expires.
+        Otherwise the write is a plain ``SET ... EX`` and the newest fill wins. A rejected
+        write evicts the key from this process's L1 rather than caching its payload.
+        """
+        entries: dict[str, tuple[dict[str, Any], bytes, str, int | None]] = {}
+        for scope, payload in payloads.items():
+            league_id, season_id = scope
+            entries[_build_key(league_id, season_id)] = (
+                payload,
+                orjson.dumps(payload),
+                _build_generation_key(league_id, season_id),
+                None if generations is None else generations.get(scope),
+            )
+        if not entries:
+            return
+        client = self._redis()
+        if client is not None:
+            try:
+                with client.pipeline(transaction=False) as pipe:
+                    for key, (_, raw_payload, generation_key, expected) in entries.items():
+                        if expected is None:
+                            pipe.set(key, raw_payload, ex=self.config.ttl_seconds)
+                        else:
+                            self._guarded_set(
+                                keys=[key, generation_key],
+                                args=[raw_payload, self.config.ttl_seconds, str(expected)],
+                                client=pipe,
+                            )
+                    stored = pipe.execute()
+            except redis.RedisError as exc:
+                self._redis_failed("storing", exc)
+            else:
+                self._redis_succeeded()
+                for (key, (payload, *_)), was_stored in zip(entries.items(), stored, strict=True):
+                    self._l1_store_result(key, payload, stored=bool(was_stored))
                 return
-            except redis.RedisError as exc:  # pragma: no cover - fallback to memory
-                logger.warning("Redis error storing standings cache: %s", exc)
         expires_at = time.time() + self.config.ttl_seconds
-        self._memory_store[key] = (raw_payload, expires_at)
+        for key, (payload, raw_payload, generation_key, expected) in entries.items():
+            was_stored = (
+                expected is None or self._memory_generations.get(generation_key, 0) == expected
+            )
+            if was_stored:
+                self._memory_store[key] = (raw_payload, expires_at)
+            self._l1_store_result(key, payload, stored=was_stored)
 
     def invalidate(self, *, league_id: UUID, season_id: UUID | None) -> None:
-        key = self._build_key(league_id, season_id)
-        if self._redis_client is not None:
-            try:
-                self._redis_client.delete(key)
-            except redis.RedisError as exc:  # pragma: no cover - log and continue
-                logger.warning("Redis error deleting standings cache key %s: %s", key, exc)
-        self._memory_store.pop(key, None)
-
+        self.invalidate_many([(league_id, season_id)])
 
-def _sort_key(item: dict[str, Any]) -> tuple[int, int, int, str]:
-    best_finish = item["best_finish"]
-    best_finish_rank = best_finish if best_finish is not None else 1_000_000
-    return (-item["points"], -item["wins"], best_finish_rank, item["display_name"].lower())
+    def invalidate_many(self, scopes: Sequence[tuple[UUID, UUID | None]]) -> None:
+        """Drop several entries and bump their generations in one pipelined round trip."""
+        if not scopes:
+            return
+        self._delete_keys(
+            [_build_key(league_id, season_id) for league_id, season_id in scopes],
+            [_build_generation_key(league_id, season_id) for league_id, season_id in scopes],
+        )
 
 
 def calculate_standings(
@@ -102,7 +329,14 @@ def calculate_standings(
     *,
     league_id: UUID,
     season_id: UUID | None,
-) -> list[dict[str, Any]]:
+    limit: int | None = None,
+    offset: int = 0,
+) -> list[StandingsRow]:
+    """Return the league/season standings, best first.
+
+    ``limit``/``offset`` page through the ordered board in SQL, so callers that only
+    show the top of a large league do not load every driver.
+    """
     event_filters = [
         Event.league_id == league_id,
         Event.status == EventStatus.COMPLETED.value,
@@ -114,21 +348,15 @@ def calculate_standings(
 
     event_join = and_(Event.id == Result.event_id, *event_filters)
 
-    points_expr = func.coalesce(
-        func.sum(
-            case((Event.id.isnot(None), Result.total_points), else_=0),
-        ),
-        0,
-    ).label("points")
-    wins_expr = func.coalesce(
-        func.sum(
-            case((and_(Event.id.isnot(None), Result.finish_position == 1), 1), else_=0),
-        ),
-        0,
-    ).label("wins")
-    best_finish_expr = func.min(case((Event.id.isnot(None), Result.finish_position))).label(
-        "best_finish"
+    # Inner-join results to the qualifying events first, so the outer join from Driver only
+    # sees counted results; SUM/MIN then skip the NULL rows of drivers without any.
+    counted_results = join(Result, Event, event_join)
+
+    points_expr = func.coalesce(func.sum(Result.total_points), 0).label("points")
+    wins_expr = func.coalesce(func.sum(case((Result.finish_position == 1, 1), else_=0)), 0).label(
+        "wins"
     )
+    best_finish_expr = func.min(Result.finish_position).label("best_finish")
 
     stmt = (
         select(
@@ -139,31 +367,41 @@ def calculate_standings(
             best_finish_expr,
         )
         .select_from(Driver)
-        .join(Result, Result.driver_id == Driver.id, isouter=True)
-        .join(Event, event_join, isouter=True)
+        .join(counted_results, Result.driver_id == Driver.id, isouter=True)
         .where(Driver.league_id == league_id)
-        .group_by(Driver.id, Driver.display_name)
+        .group_by(Driver.id)
+        .order_by(
+            points_expr.desc(),
+            wins_expr.desc(),
+            func.coalesce(best_finish_expr, _NO_FINISH_RANK).asc(),
+            func.lower(Driver.display_name).asc(),
+        )
     )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    if offset:
+        stmt = stmt.offset(offset)
 
-    rows = session.execute(stmt).all()
-
-    standings: list[dict[str, Any]] = []
-    for row in rows:
-        points_value = int(row.points or 0)
-        wins_value = int(row.wins or 0)
-        best_finish_value = int(row.best_finish) if row.best_finish is not None else None
-        standings.append(
-            {
-                "driver_id": row.driver_id,
-                "display_name": row.display_name,
-                "points": points_value,
-                "wins": wins_value,
-                "best_finish": best_finish_value,
-            }
+    return [
+        StandingsRow(
+            driver_id,
+            display_name,
+            int(points or 0),
+            int(wins or 0),
+            int(best_finish) if best_finish is not None else None,
         )
+        for driver_id, display_name, points, wins, best_finish in session.execute(stmt)
+    ]
+
 
-    standings.sort(key=_sort_key)
-    return standings
+def invalidate_league_standings(
+    session: Session, cache: StandingsCache, *, league_id: UUID
+) -> None:
+    """Drop every cached standings scope of a league, e.g. after a driver change."""
+    season_ids = session.execute(select(Season.id).where(Season.league_id == league_id)).scalars()
+    cache.invalidate_many(
+        [(league_id, None), *((league_id, season_id) for season_id in season_ids)]
+    )
 
 
 _cache_instance: StandingsCache | None = None
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 import re
+import string
 from dataclasses import dataclass
 from functools import lru_cache
-from io import BytesIO
-from typing import Literal
+from io import SEEK_END, BytesIO
+from tempfile import SpooledTemporaryFile
+from threading import Lock
+from typing import Any, Literal
 from uuid import uuid4
 
 import boto3
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config as BotoConfig
 from botocore.exceptions import ClientError
 from fastapi import HTTPException, status
@@ -51,15 +56,31 @@ PROFILES: dict[AllowedUploadKind, UploadProfile] = {
 }
 
 _FILENAME_SANITIZER = re.compile(r"[^A-Za-z0-9._-]")
+_FILENAME_SAFE_CHARS = frozenset(string.ascii_letters + string.digits + "._-")
+# str.translate equivalent of _FILENAME_SANITIZER for the (common) all-ASCII case.
+_FILENAME_TRANSLATION = {i: "-" for i in range(128) if chr(i) not in _FILENAME_SAFE_CHARS}
 _IMAGE_FORMAT_BY_CONTENT_TYPE = {
     "image/jpeg": "JPEG",
     "image/png": "PNG",
     "image/webp": "WEBP",
 }
 
+# APP1 carries Exif and XMP, APP13 carries Photoshop/IPTC records.
+_JPEG_METADATA_MARKERS = frozenset({0xE1, 0xED, 0xFE})  # APP1, APP13, COM
+_JPEG_START_OF_SCAN = 0xDA
+_JPEG_END_OF_IMAGE = 0xD9
+_WEBP_METADATA_CHUNKS = frozenset({b"EXIF", b"XMP "})
+_VP8X_METADATA_FLAGS = 0x08 | 0x04  # EXIF and XMP presence bits
+
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
 
+def _sanitize_filename(filename: str) -> str:
+    if filename.isascii():
+        return filename.translate(_FILENAME_TRANSLATION)
+    return _FILENAME_SANITIZER.sub("-", filename)
+
+
 def _sanitize_extension(filename: str) -> str:
     # fall back to empty extension so configured mapping can decide
     dot_index = filename.rfind(".")
@@ -68,17 +89,40 @@ def _sanitize_extension(filename: str) -> str:
     return ""
 
 
+_S3_CLIENT_CONFIG = BotoConfig(
+    signature_version="s3v4",
+    max_pool_connections=50,
+    retries={"max_attempts": 3, "mode": "standard"},
+    tcp_keepalive=True,
+)
+# boto3 sessions are not thread-safe, so client construction is serialised; the clients
+# themselves are safe to share and keep their connection pool warm between requests.
+_CLIENT_LOCK = Lock()
+_last_client: tuple[Settings, Any] | None = None
+_SPOOL_MAX_BYTES = 1 << 20
+# Set on objects we have already sanitized. Presigned POST policies reject extra form
+# fields, so clients cannot attach this metadata to their own uploads.
+_SANITIZED_METADATA_KEY = "exif-stripped"
+_SANITIZED_METADATA = {_SANITIZED_METADATA_KEY: "1"}
+_UPLOAD_TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, use_threads=False)
+
+
+@lru_cache(maxsize=1)
+def _boto_session() -> boto3.session.Session:
+    return boto3.session.Session()
+
+
 @lru_cache(maxsize=4)
 def _cached_client(endpoint: str, access_key: str, secret_key: str, region: str | None):
-    session = boto3.session.Session()
-    return session.client(
-        "s3",
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name=region or None,
-        endpoint_url=endpoint or None,
-        config=BotoConfig(signature_version="s3v4"),
-    )
+    with _CLIENT_LOCK:
+        return _boto_session().client(
+            "s3",
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            region_name=region or None,
+            endpoint_url=endpoint or None,
+            config=_S3_CLIENT_CONFIG,
+        )
 
 
 def _get_s3_client(settings: Settings):
@@ -88,22 +132,35 @@ def _get_s3_client(settings: Settings):
             detail={"error": "s3_not_enabled", "message": "S3 uploads are not enabled."},
         )
 
-    return _cached_client(
+    global _last_client
+    # get_settings() is a singleton, so an identity check usually answers this without
+    # rebuilding and hashing the lru_cache key. Holding the settings object keeps its id
+    # from being reused by a different instance.
+    cached = _last_client
+    if cached is not None and cached[0] is settings:
+        return cached[1]
+
+    client = _cached_client(
         str(settings.s3_endpoint) if settings.s3_endpoint else "",
         settings.s3_access_key or "",
         settings.s3_secret_key or "",
         settings.s3_region,
     )
+    _last_client = (settings, client)
+    return client
 
 
 def _build_object_key(profile: UploadProfile, filename: str, content_type: str) -> str:
-    stripped = _FILENAME_SANITIZER.sub("-", filename).strip("-")
+    stripped = _sanitize_filename(filename).strip("-")
     ext_from_name = _sanitize_extension(stripped)
     ext = profile.content_types.get(content_type)
     if ext is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"error": "unsupported_content_type", "message": f"Content type {content_type} is not allowed."},
+            detail={
+                "error": "unsupported_content_type",
+                "message": f"Content type {content_type} is not allowed.",
+            },
         )
 
     if not ext and ext_from_name:
@@ -112,7 +169,9 @@ def _build_object_key(profile: UploadProfile, filename: str, content_type: str)
     return f"{profile.prefix}{uuid4().hex}{ext}"
 
 
-def generate_presigned_post(kind: AllowedUploadKind, filename: str, content_type: str, settings: Settings | None = None) -> dict:
+def generate_presigned_post(
+    kind: AllowedUploadKind, filename: str, content_type: str, settings: Settings | None = None
+) -> dict:
     active_settings = settings or get_settings()
     profile = PROFILES[kind]
     object_key = _build_object_key(profile, filename, content_type)
@@ -146,7 +205,9 @@ def generate_presigned_post(kind: AllowedUploadKind, filename: str, content_type
     }
 
 
-def generate_presigned_get_url(object_key: str, settings: Settings | None = None, expires_in: int | None = None) -> dict:
+def generate_presigned_get_url(
+    object_key: str, settings: Settings | None = None, expires_in: int | None = None
+) -> dict:
     active_settings = settings or get_settings()
     client = _get_s3_client(active_settings)
     ttl = expires_in or active_settings.s3_presign_ttl or 3600
@@ -166,14 +227,19 @@ def generate_presigned_get_url(object_key: str, settings: Settings | None = None
     return {"url": url, "expiresIn": ttl}
 
 
-def finalize_upload(kind: AllowedUploadKind, object_key: str, settings: Settings | None = None) -> dict:
+def finalize_upload(
+    kind: AllowedUploadKind, object_key: str, settings: Settings | None = None
+) -> dict:
     active_settings = settings or get_settings()
     profile = PROFILES[kind]
 
     if not object_key.startswith(profile.prefix):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"error": "invalid_object_key", "message": "Object key does not match the expected prefix."},
+            detail={
+                "error": "invalid_object_key",
+                "message": "Object key does not match the expected prefix.",
+            },
         )
 
     client = _get_s3_client(active_settings)
@@ -185,7 +251,10 @@ def finalize_upload(kind: AllowedUploadKind, object_key: str, settings: Settings
         if error_code in {"404", "NoSuchKey", "NoSuchBucket", "NotFound"}:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail={"error": "object_not_found", "message": "Uploaded object could not be located."},
+                detail={
+                    "error": "object_not_found",
+                    "message": "Uploaded object could not be located.",
+                },
             ) from exc
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -198,16 +267,23 @@ def finalize_upload(kind: AllowedUploadKind, object_key: str, settings: Settings
     if content_length == 0 or content_length > profile.max_size:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail={"error": "object_too_large", "message": "Uploaded object exceeds configured size limits."},
+            detail={
+                "error": "object_too_large",
+                "message": "Uploaded object exceeds configured size limits.",
+            },
         )
 
     if not content_type or content_type not in profile.content_types:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"error": "unsupported_content_type", "message": f"Content type {content_type!r} is not allowed."},
+            detail={
+                "error": "unsupported_content_type",
+                "message": f"Content type {content_type!r} is not allowed.",
+            },
         )
 
-    if profile.strip_exif:
+    already_sanitized = head.get("Metadata", {}).get(_SANITIZED_METADATA_KEY) == "1"
+    if profile.strip_exif and not already_sanitized:
         content_length = _strip_exif_in_place(
             client=client,
             bucket=active_settings.s3_bucket,
@@ -244,52 +320,88 @@ def _strip_exif_in_place(
 
     body = obj["Body"]
     try:
-        data = body.read()
+        # Never buffer more than one byte past the limit, even if the object grew
+        # between the HEAD check and this GET.
+        data = body.read(max_size + 1)
     finally:
         body.close()
 
     if len(data) > max_size:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail={"error": "object_too_large", "message": "Uploaded object exceeds configured size limits."},
+            detail={
+                "error": "object_too_large",
+                "message": "Uploaded object exceeds configured size limits.",
+            },
         )
 
     try:
+        # Image.open only parses the header; pixels are decoded on demand.
         image = Image.open(BytesIO(data))
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"error": "invalid_image", "message": f"Unable to process uploaded image: {exc}"},
+            detail={
+                "error": "invalid_image",
+                "message": f"Unable to process uploaded image: {exc}",
+            },
         ) from exc
 
     image_format = _IMAGE_FORMAT_BY_CONTENT_TYPE.get(content_type) or image.format
     if not image_format:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"error": "unsupported_content_type", "message": f"Content type {content_type!r} is not allowed."},
+            detail={
+                "error": "unsupported_content_type",
+                "message": f"Content type {content_type!r} is not allowed.",
+            },
         )
 
-    if image_format == "JPEG":
-        image = image.convert("RGB")
+    sanitized_bytes: bytes | None = None
+    if image.format == image_format:
+        sanitized_bytes = _strip_metadata_segments(data, image_format)
+    if sanitized_bytes is not None and sanitized_bytes == data:
+        _mark_sanitized(client, bucket, object_key, content_type)
+        return len(data)
+
+    if sanitized_bytes is not None:
+        output = BytesIO(sanitized_bytes)
+    else:
+        output = _reencode_without_metadata(image, image_format)
+    # Drop the original buffer before uploading so only the sanitized copy stays resident.
+    del data, sanitized_bytes, image
+    try:
+        output.seek(0, SEEK_END)
+        content_length = output.tell()
+        output.seek(0)
+        client.upload_fileobj(
+            output,
+            bucket,
+            object_key,
+            ExtraArgs={"ContentType": content_type, "Metadata": _SANITIZED_METADATA},
+            Config=_UPLOAD_TRANSFER_CONFIG,
+        )
+    except (ClientError, S3UploadFailedError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail={"error": "s3_write_failed", "message": str(exc)},
+        ) from exc
+    finally:
+        output.close()
 
-    output = BytesIO()
-    save_kwargs: dict[str, object] = {"format": image_format}
-    if image_format == "JPEG":
-        save_kwargs.update({"optimize": True, "quality": 92, "progressive": True})
-    elif image_format == "PNG":
-        save_kwargs.update({"optimize": True})
-    elif image_format == "WEBP":
-        save_kwargs.update({"quality": 92})
+    return content_length
 
-    image.save(output, **save_kwargs)
-    sanitized_bytes = output.getvalue()
 
+def _mark_sanitized(client, bucket: str, object_key: str, content_type: str) -> None:
+    """Tag an object that needed no changes so later finalize calls skip the download."""
     try:
-        client.put_object(
+        client.copy_object(
             Bucket=bucket,
             Key=object_key,
-            Body=sanitized_bytes,
+            CopySource={"Bucket": bucket, "Key": object_key},
             ContentType=content_type,
+            Metadata=_SANITIZED_METADATA,
+            MetadataDirective="REPLACE",
         )
     except ClientError as exc:
         raise HTTPException(
@@ -297,4 +409,107 @@ def _strip_exif_in_place(
             detail={"error": "s3_write_failed", "message": str(exc)},
         ) from exc
 
-    return len(sanitized_bytes)
+
+def _reencode_without_metadata(image: Image.Image, image_format: str) -> SpooledTemporaryFile:
+    if image_format == "JPEG":
+        image = image.convert("RGB")
+
+    # Small avatars stay in memory; larger re-encodes spill to disk instead of
+    # holding a second full copy of the image in RAM.
+    output = SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES)
+    save_kwargs: dict[str, object] = {"format": image_format}
+    if image_format == "JPEG":
+        save_kwargs.update({"optimize": True, "quality": 92, "progressive": True})
+    elif image_format == "PNG":
+        save_kwargs.update({"optimize": True})
+    elif image_format == "WEBP":
+        save_kwargs.update({"quality": 92})
+
+    image.save(output, **save_kwargs)
+    return output
+
+
+def _strip_metadata_segments(data: bytes, image_format: str) -> bytes | None:
+    """Remove metadata containers without decoding pixels.
+
+    Returns None when the format is not handled or the container layout is not
+    what we expect, in which case the caller falls back to a full re-encode.
+    """
+    if image_format == "JPEG":
+        return _strip_jpeg_metadata(data)
+    if image_format == "WEBP":
+        return _strip_webp_metadata(data)
+    return None
+
+
+def _strip_jpeg_metadata(data: bytes) -> bytes | None:
+    if not data.startswith(b"\xff\xd8"):
+        return None
+
+    kept = [data[:2]]
+    pos = 2
+    while pos + 2 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte before a marker
+            pos += 1
+            continue
+        if marker == _JPEG_END_OF_IMAGE:
+            # Anything appended after EOI is not part of the image and is dropped.
+            kept.append(data[pos : pos + 2])
+            return b"".join(kept)
+        if pos + 4 > len(data):
+            return None
+        segment_end = pos + 2 + int.from_bytes(data[pos + 2 : pos + 4], "big")
+        if segment_end <= pos + 3 or segment_end > len(data):
+            return None
+        if marker not in _JPEG_METADATA_MARKERS:
+            kept.append(data[pos:segment_end])
+        pos = segment_end
+        if marker == _JPEG_START_OF_SCAN:
+            # Copy the entropy-coded data up to the next real marker; progressive files
+            # carry further segments (tables, comments, scans) between their scans.
+            scan_end = _jpeg_scan_end(data, pos)
+            kept.append(data[pos:scan_end])
+            pos = scan_end
+    return None
+
+
+def _jpeg_scan_end(data: bytes, pos: int) -> int:
+    """Return the offset of the first marker after entropy-coded data at ``pos``."""
+    while True:
+        pos = data.find(b"\xff", pos)
+        if pos < 0 or pos + 1 >= len(data):
+            return len(data)
+        follower = data[pos + 1]
+        # 0x00 is a stuffed data byte, 0xD0-0xD7 are restart markers inside the scan.
+        if follower == 0x00 or 0xD0 <= follower <= 0xD7:
+            pos += 2
+            continue
+        return pos
+
+
+def _strip_webp_metadata(data: bytes) -> bytes | None:
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WEBP":
+        return None
+
+    kept: list[bytes] = []
+    pos = 12
+    while pos + 8 <= len(data):
+        fourcc = data[pos : pos + 4]
+        size = int.from_bytes(data[pos + 4 : pos + 8], "little")
+        chunk_end = pos + 8 + size + (size & 1)
+        if chunk_end > len(data):
+            return None
+        if fourcc == b"VP8X" and size >= 1:
+            flags = data[pos + 8] & ~_VP8X_METADATA_FLAGS
+            kept.append(data[pos : pos + 8] + bytes([flags]) + data[pos + 9 : chunk_end])
+        elif fourcc not in _WEBP_METADATA_CHUNKS:
+            kept.append(data[pos:chunk_end])
+        pos = chunk_end
+    if pos != len(data):
+        return None
+
+    body = b"".join(kept)
+    return b"RIFF" + (len(body) + 4).to_bytes(4, "little") + b"WEBP" + body
@@ -1,3 +1,4 @@
+import argparse
 import os
 from pathlib import Path
 import sys
@@ -8,28 +9,49 @@ from fastapi.testclient import TestClient
 from moto import mock_aws
 import boto3
 
-os.environ['APP_ENV'] = 'development'
-os.environ['S3_ENABLED'] = 'true'
-os.environ['S3_BUCKET'] = 'gridboss-test'
-os.environ['S3_REGION'] = 'us-east-1'
-os.environ['S3_ENDPOINT'] = 'https://s3.amazonaws.com'
-os.environ['S3_ACCESS_KEY'] = 'test-access'
-os.environ['S3_SECRET_KEY'] = 'test-secret'
-os.environ['S3_PRESIGN_TTL'] = '600'
-
 from gridboss_config import get_settings
 from app.services import storage
 
+_client: TestClient | None = None
+
+
+def configure_env():
+    os.environ['APP_ENV'] = 'development'
+    os.environ['S3_ENABLED'] = 'true'
+    os.environ['S3_BUCKET'] = 'gridboss-test'
+    os.environ['S3_REGION'] = 'us-east-1'
+    os.environ['S3_ENDPOINT'] = 'https://s3.amazonaws.com'
+    os.environ['S3_ACCESS_KEY'] = 'test-access'
+    os.environ['S3_SECRET_KEY'] = 'test-secret'
+    os.environ['S3_PRESIGN_TTL'] = '600'
+
+
+def get_client():
+    # Importing app.main dominates the run time, so build the client once per interpreter.
+    global _client
+    if _client is None:
+        from app.main import app
+        _client = TestClient(app)
+    return _client
+
+
 @mock_aws
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sign an avatar upload against a mocked S3 bucket.')
+    parser.add_argument('--repeat', type=int, default=1, help='number of sign requests to send')
+    args = parser.parse_args(argv)
+
+    configure_env()
     get_settings.cache_clear()
     storage._cached_client.cache_clear()  # type: ignore[attr-defined]
+    storage._last_client = None
     boto3.client('s3', region_name='us-east-1', aws_access_key_id='test-access', aws_secret_access_key='test-secret').create_bucket(Bucket='gridboss-test')
-    from app.main import app
-    client = TestClient(app)
-    resp = client.post('/uploads/sign', json={'kind': 'avatar', 'filename': 'driver.png', 'content_type': 'image/png'})
-    print(resp.status_code)
-    print(resp.json())
+    client = get_client()
+    for _ in range(args.repeat):
+        resp = client.post('/uploads/sign', json={'kind': 'avatar', 'filename': 'driver.png', 'content_type': 'image/png'})
+        print(resp.status_code)
+        print(resp.json())
+
 
 if __name__ == '__main__':
     main()
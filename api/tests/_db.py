@@ -0,0 +1,76 @@
+"""In-memory SQLite database shared by the API test modules.
+
+Importing this module builds the engine and the schema once per pytest process (so
+once per worker under ``pytest -n``); tests that share it run inside
+``isolated_database()`` so their writes are rolled back.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from itertools import count
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import Base
+
+SQLALCHEMY_DATABASE_URL = "sqlite+pysqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    future=True,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+
+
+# pysqlite defers BEGIN until the first DML statement, which turns a SAVEPOINT into its
+# own transaction; take over transaction control so savepoints nest inside BEGIN.
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, _connection_record) -> None:
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "begin")
+def _emit_begin(connection) -> None:
+    connection.exec_driver_sql("BEGIN")
+
+
+TestingSessionLocal = sessionmaker(
+    bind=engine,
+    autoflush=False,
+    autocommit=False,
+    expire_on_commit=False,
+)
+
+
+Base.metadata.create_all(bind=engine)
+
+
+@contextmanager
+def isolated_database() -> Iterator[None]:
+    """Run a test inside one outer transaction that is rolled back afterwards.
+
+    Every session created from ``TestingSessionLocal`` meanwhile joins that transaction
+    through a SAVEPOINT, so its ``commit()`` only releases the savepoint and teardown is a
+    single ROLLBACK instead of a DELETE per table.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    TestingSessionLocal.configure(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield
+    finally:
+        TestingSessionLocal.configure(bind=engine, join_transaction_mode="conservative_savepoint")
+        transaction.rollback()
+        connection.close()
+
+
+_suffixes = count()
+
+
+def unique_suffix() -> str:
+    """Return a suffix for slugs and external ids that no other test in the run reuses."""
+    return f"{next(_suffixes):08x}"
@@ -0,0 +1,28 @@
+"""One-shot SQLite compatibility tweaks to the shared ORM metadata."""
+
+from __future__ import annotations
+
+from app.db import Base
+
+_DONE = False
+
+
+def strip_uuid_defaults() -> None:
+    """Drop ``gen_random_uuid()`` server defaults, which SQLite cannot parse.
+
+    The models generate their ids client-side as well, so nothing depends on the server
+    default under test. Safe to call repeatedly; the metadata is only walked once.
+    """
+    global _DONE  # noqa: PLW0603 - one-shot guard
+    if _DONE:
+        return
+    for table in Base.metadata.sorted_tables:
+        for column in table.c:
+            default = getattr(column, "server_default", None)
+            if (
+                default is not None
+                and hasattr(default, "arg")
+                and "gen_random_uuid" in str(default.arg)
+            ):
+                column.server_default = None
+    _DONE = True
@@ -4,6 +4,10 @@ import json
 import os
 import sys
 import types
+from collections.abc import Generator
+
+import pytest
+from fastapi.testclient import TestClient
 
 TEST_ENV_DEFAULTS = {
     "APP_ENV": "test",
@@ -39,6 +43,12 @@ TEST_ENV_DEFAULTS = {
 for _key, _value in TEST_ENV_DEFAULTS.items():
     os.environ.setdefault(_key, _value)
 
+# Runs before any test module is imported, so every engine's create_all sees the
+# SQLite-compatible metadata regardless of collection order.
+from tests._schema_prep import strip_uuid_defaults  # noqa: E402
+
+strip_uuid_defaults()
+
 
 if "dramatiq" not in sys.modules:
 
@@ -90,3 +100,30 @@ if "stripe" not in sys.modules:
         SignatureVerificationError=_StripeSignatureError
     )
     sys.modules["stripe"] = stripe_module
+
+
+@pytest.fixture(scope="session", autouse=True)
+def clear_settings_cache() -> Generator[None, None, None]:
+    # Modules that change settings inject them through app.dependency_overrides or clear
+    # the cache themselves after patching the environment; only the session edges need it.
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+@pytest.fixture(scope="session")
+def shared_client() -> Generator[TestClient, None, None]:
+    """One TestClient (and one lifespan startup/shutdown) for the whole session."""
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture()
+def client(shared_client: TestClient) -> TestClient:
+    # Cookies are the only per-client state that could leak between tests.
+    shared_client.cookies.clear()
+    return shared_client
@@ -1,81 +1,57 @@
 from __future__ import annotations
 
+from collections.abc import Generator
 from datetime import UTC, datetime
 from uuid import uuid4
 
 import pytest
 from fastapi import status
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 
 from app.core.settings import Settings, get_settings
-from app.db import Base
 from app.db.models import AuditLog, League, LeagueRole, Membership, User
 from app.db.session import get_session
 from app.dependencies.auth import get_current_user
 from app.main import app
 from app.services.audit import record_audit_log
-
-SQLALCHEMY_DATABASE_URL = "sqlite+pysqlite:///:memory:"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    future=True,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(
-    bind=engine,
-    autoflush=False,
-    autocommit=False,
-    expire_on_commit=False,
+from tests._db import TestingSessionLocal, isolated_database, unique_suffix
+
+
+_BASE_SETTINGS = Settings(
+    APP_ENV="test",
+    APP_URL="http://localhost:5173",
+    API_URL="http://localhost:8000",
+    DISCORD_CLIENT_ID="client",
+    DISCORD_CLIENT_SECRET="secret",
+    DISCORD_REDIRECT_URI="http://localhost:8000/auth/discord/callback",
+    JWT_SECRET="secret",
+    JWT_ACCESS_TTL_MIN=15,
+    JWT_REFRESH_TTL_DAYS=14,
+    CORS_ORIGINS="http://localhost:5173",
+    REDIS_URL="redis://localhost:6379/0",
 )
 
-for table in Base.metadata.sorted_tables:
-    for column in table.c:
-        default = getattr(column, "server_default", None)
-        if (
-            default is not None
-            and hasattr(default, "arg")
-            and "gen_random_uuid" in str(default.arg)
-        ):
-            column.server_default = None
-
-Base.metadata.create_all(bind=engine)
-
-
-def reset_database() -> None:
-    with engine.begin() as connection:
-        for table in reversed(Base.metadata.sorted_tables):
-            connection.execute(table.delete())
-
 
-@pytest.fixture(autouse=True)
-def override_dependencies() -> None:
-    reset_database()
-    get_settings.cache_clear()
-    settings = Settings(
-        APP_ENV="test",
-        APP_URL="http://localhost:5173",
-        API_URL="http://localhost:8000",
-        DISCORD_CLIENT_ID="client",
-        DISCORD_CLIENT_SECRET="secret",
-        DISCORD_REDIRECT_URI="http://localhost:8000/auth/discord/callback",
-        JWT_SECRET="secret",
-        JWT_ACCESS_TTL_MIN=15,
-        JWT_REFRESH_TTL_DAYS=14,
-        CORS_ORIGINS="http://localhost:5173",
-        REDIS_URL="redis://localhost:6379/0",
-    )
-
-    def get_test_session() -> Session:
+@pytest.fixture()
+def session() -> Generator[Session, None, None]:
+    """The one Session a test uses, shared with the request handlers it calls."""
+    with isolated_database():
         db = TestingSessionLocal()
         try:
             yield db
         finally:
             db.close()
 
+
+@pytest.fixture(autouse=True)
+def override_dependencies(session: Session) -> Generator[None, None, None]:
+    settings = _BASE_SETTINGS.model_copy()
+
+    def get_test_session() -> Generator[Session, None, None]:
+        yield session
+
     app.dependency_overrides[get_settings] = lambda: settings
     app.dependency_overrides[get_session] = get_test_session
 
@@ -84,38 +60,22 @@ def override_dependencies() -> None:
     app.dependency_overrides.clear()
 
 
-@pytest.fixture()
-def client() -> TestClient:
-    with TestClient(app) as test_client:
-        yield test_client
-
-
-@pytest.fixture()
-def session() -> Session:
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 def create_user(session: Session) -> User:
+    suffix = unique_suffix()
     user = User(
-        discord_id=str(uuid4()),
+        discord_id=suffix,
         discord_username="user",
-        email=f"{uuid4().hex}@example.com",
+        email=f"{suffix}@example.com",
     )
     session.add(user)
     session.commit()
-    session.refresh(user)
     return user
 
 
 def create_league(session: Session, owner: User) -> League:
-    league = League(name="League", slug=f"league-{uuid4().hex[:8]}", owner_id=owner.id)
+    league = League(name="League", slug=f"league-{unique_suffix()}", owner_id=owner.id)
     session.add(league)
-    session.commit()
-    session.refresh(league)
+    session.flush()
     membership = Membership(league_id=league.id, user_id=owner.id, role=LeagueRole.OWNER)
     session.add(membership)
     session.commit()
@@ -146,9 +106,9 @@ def test_record_audit_log_serializes_state(session: Session) -> None:
     )
     session.commit()
 
-    log = session.execute(select(AuditLog)).scalar_one()
-    assert log.before_state["time"] == timestamp.isoformat()
-    assert log.before_state["identifier"] == str(identifier)
+    before_state = session.execute(select(AuditLog.before_state)).scalar_one()
+    assert before_state["time"] == timestamp.isoformat()
+    assert before_state["identifier"] == str(identifier)
 
 
 def test_list_audit_logs_redacts_sensitive_fields(client: TestClient, session: Session) -> None:
@@ -6,27 +6,16 @@ from urllib.parse import parse_qs, urlparse
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from httpx import Response
+from sqlalchemy.orm import Session
 
+from app.core.security import create_access_token, create_refresh_token
 from app.core.settings import Settings, get_settings
-from app.db import Base
 from app.db.models import User
 from app.db.session import get_session
 from app.main import app
 from app.routes.auth import provide_discord_client
-
-SQLALCHEMY_DATABASE_URL = "sqlite+pysqlite:///:memory:"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    future=True,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(
-    bind=engine, autoflush=False, autocommit=False, expire_on_commit=False
-)
+from tests._db import TestingSessionLocal, isolated_database
 
 
 class StubDiscordClient:
@@ -45,32 +34,26 @@ class StubDiscordClient:
         }
 
 
-@pytest.fixture(scope="session", autouse=True)
-def setup_database() -> None:
-    for table in Base.metadata.sorted_tables:
-        for column in table.c:
-            default = getattr(column, "server_default", None)
-            if default is not None and "gen_random_uuid" in str(default.arg):
-                column.server_default = None
-    Base.metadata.create_all(bind=engine)
+# Stateless, so one instance serves every request in every test.
+_STUB_DISCORD_CLIENT = StubDiscordClient()
+
+_BASE_SETTINGS = Settings(
+    APP_ENV="test",
+    APP_URL="http://localhost:5173",
+    API_URL="http://localhost:8000",
+    DISCORD_CLIENT_ID="client",
+    DISCORD_CLIENT_SECRET="secret",  # noqa: S106
+    DISCORD_REDIRECT_URI="http://localhost:8000/auth/discord/callback",
+    JWT_SECRET="test-secret",  # noqa: S106
+    JWT_ACCESS_TTL_MIN=15,
+    JWT_REFRESH_TTL_DAYS=14,
+    CORS_ORIGINS="http://localhost:5173",
+)
 
 
 @pytest.fixture(autouse=True)
-def override_dependencies() -> Generator[None, None, None]:
-    test_settings = Settings(
-        APP_ENV="test",
-        APP_URL="http://localhost:5173",
-        API_URL="http://localhost:8000",
-        DISCORD_CLIENT_ID="client",
-        DISCORD_CLIENT_SECRET="secret",  # noqa: S106
-        DISCORD_REDIRECT_URI="http://localhost:8000/auth/discord/callback",
-        JWT_SECRET="test-secret",  # noqa: S106
-        JWT_ACCESS_TTL_MIN=15,
-        JWT_REFRESH_TTL_DAYS=14,
-        CORS_ORIGINS="http://localhost:5173",
-    )
-
-    get_settings.cache_clear()
+def override_dependencies() -> Generator[Settings, None, None]:
+    test_settings = _BASE_SETTINGS.model_copy()
     import app.main as app_main
 
     app_main.settings = test_settings
@@ -87,17 +70,53 @@ def override_dependencies() -> Generator[None, None, None]:
 
     app.dependency_overrides[get_settings] = get_test_settings
     app.dependency_overrides[get_session] = get_test_session
-    app.dependency_overrides[provide_discord_client] = lambda: StubDiscordClient()
+    app.dependency_overrides[provide_discord_client] = lambda: _STUB_DISCORD_CLIENT
 
-    yield
+    with isolated_database():
+        yield test_settings
 
     app.dependency_overrides.clear()
 
 
 @pytest.fixture()
-def client() -> Generator[TestClient, None, None]:
-    with TestClient(app) as test_client:
-        yield test_client
+def oauth_callback(client: TestClient) -> Response:
+    """Run the Discord start -> callback handshake and return the callback response."""
+    start_response = client.get("/auth/discord/start", allow_redirects=False)
+    state_cookie = start_response.cookies.get("gb_oauth_state")
+    verifier_cookie = start_response.cookies.get("gb_pkce_verifier")
+    return client.get(
+        "/auth/discord/callback",
+        params={"code": "fake-code", "state": state_cookie},
+        headers={"Cookie": f"gb_oauth_state={state_cookie}; gb_pkce_verifier={verifier_cookie}"},
+        allow_redirects=False,
+    )
+
+
+@pytest.fixture()
+def discord_user(override_dependencies: Settings) -> User:
+    """The stub Discord user, inserted directly instead of via the OAuth handshake."""
+    db = TestingSessionLocal()
+    try:
+        user = User(
+            discord_id="1234567890",
+            discord_username="TestDriver",
+            email="driver@example.com",
+        )
+        db.add(user)
+        db.commit()
+        return user
+    finally:
+        db.close()
+
+
+@pytest.fixture()
+def refresh_token(discord_user: User, override_dependencies: Settings) -> str:
+    return create_refresh_token(subject=str(discord_user.id), settings=override_dependencies)
+
+
+@pytest.fixture()
+def access_token(discord_user: User, override_dependencies: Settings) -> str:
+    return create_access_token(subject=str(discord_user.id), settings=override_dependencies)
 
 
 class TestAuthFlow:
@@ -108,24 +127,11 @@ class TestAuthFlow:
         assert "gb_pkce_verifier" in response.cookies
         assert "gb_oauth_state" in response.cookies
 
-    def test_callback_creates_user_and_sets_tokens(self, client: TestClient) -> None:
-        start_response = client.get("/auth/discord/start", allow_redirects=False)
-        state_cookie = start_response.cookies.get("gb_oauth_state")
-        verifier_cookie = start_response.cookies.get("gb_pkce_verifier")
-
-        callback_response = client.get(
-            "/auth/discord/callback",
-            params={"code": "fake-code", "state": state_cookie},
-            headers={
-                "Cookie": f"gb_oauth_state={state_cookie}; gb_pkce_verifier={verifier_cookie}"
-            },
-            allow_redirects=False,
-        )
-
-        assert callback_response.status_code == HTTPStatus.FOUND
-        assert "gb_refresh_token" in callback_response.cookies
+    def test_callback_creates_user_and_sets_tokens(self, oauth_callback: Response) -> None:
+        assert oauth_callback.status_code == HTTPStatus.FOUND
+        assert "gb_refresh_token" in oauth_callback.cookies
 
-        redirect_url = callback_response.headers["location"]
+        redirect_url = oauth_callback.headers["location"]
         parsed = urlparse(redirect_url)
         access_token = parse_qs(parsed.query).get("access_token", [None])[0]
         assert access_token is not None
@@ -136,21 +142,8 @@ class TestAuthFlow:
         finally:
             db.close()
 
-    def test_refresh_rotates_tokens(self, client: TestClient) -> None:
-        start_response = client.get("/auth/discord/start", allow_redirects=False)
-        state_cookie = start_response.cookies.get("gb_oauth_state")
-        verifier_cookie = start_response.cookies.get("gb_pkce_verifier")
-        callback_response = client.get(
-            "/auth/discord/callback",
-            params={"code": "fake-code", "state": state_cookie},
-            headers={
-                "Cookie": f"gb_oauth_state={state_cookie}; gb_pkce_verifier={verifier_cookie}"
-            },
-            allow_redirects=False,
-        )
-        refresh_cookie = callback_response.cookies.get("gb_refresh_token")
-
-        client.cookies.set("gb_refresh_token", refresh_cookie)
+    def test_refresh_rotates_tokens(self, client: TestClient, refresh_token: str) -> None:
+        client.cookies.set("gb_refresh_token", refresh_token)
         refresh_response = client.post("/auth/refresh")
         assert refresh_response.status_code == HTTPStatus.OK, refresh_response.json()
         body = refresh_response.json()
@@ -160,28 +153,10 @@ class TestAuthFlow:
         unauth = client.get("/auth/me")
         assert unauth.status_code == HTTPStatus.UNAUTHORIZED
 
-        start_response = client.get("/auth/discord/start", allow_redirects=False)
-        state_cookie = start_response.cookies.get("gb_oauth_state")
-        verifier_cookie = start_response.cookies.get("gb_pkce_verifier")
-        callback_response = client.get(
-            "/auth/discord/callback",
-            params={"code": "fake-code", "state": state_cookie},
-            headers={
-                "Cookie": f"gb_oauth_state={state_cookie}; gb_pkce_verifier={verifier_cookie}"
-            },
-            allow_redirects=False,
-        )
-
-        refresh_cookie = callback_response.cookies.get("gb_refresh_token")
-        # rotate to ensure cookies valid for me request
-        client.cookies.set("gb_refresh_token", refresh_cookie)
-        refresh_response = client.post("/auth/refresh")
-        assert refresh_response.status_code == HTTPStatus.OK, refresh_response.json()
-        new_access_token = refresh_response.json()["access_token"]
-
+    def test_me_returns_user(self, client: TestClient, access_token: str) -> None:
         me_response = client.get(
             "/auth/me",
-            headers={"Authorization": f"Bearer {new_access_token}"},
+            headers={"Authorization": f"Bearer {access_token}"},
         )
         assert me_response.status_code == HTTPStatus.OK, me_response.json()
         payload = me_response.json()
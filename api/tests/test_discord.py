@@ -1,8 +1,7 @@
 ﻿from __future__ import annotations
 
 import sys
-from collections.abc import Generator
-from contextlib import contextmanager
+from collections.abc import Callable, Generator
 from datetime import UTC, datetime, timedelta
 from http import HTTPStatus
 from pathlib import Path
@@ -14,13 +13,11 @@ if str(ROOT) not in sys.path:
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
 from worker.jobs import discord as discord_jobs
 
 from app.core.settings import Settings, get_settings
-from app.db import Base
 from app.db.models import (
     AuditLog,
     BillingAccount,
@@ -34,19 +31,35 @@ from app.db.session import get_session
 from app.dependencies.auth import get_current_user
 from app.main import app
 from app.routes.auth import provide_discord_client
+from tests._db import TestingSessionLocal, isolated_database, unique_suffix
 
-SQLALCHEMY_DATABASE_URL = "sqlite+pysqlite:///:memory:"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    future=True,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+
+# Verification queries are built once and bound per test.
+_SELECT_INTEGRATION_BY_LEAGUE = select(DiscordIntegration).where(
+    DiscordIntegration.league_id == bindparam("league_id")
+)
+_SELECT_AUDIT_LOG_BY_ACTION = select(AuditLog).where(
+    AuditLog.action == bindparam("action"), AuditLog.league_id == bindparam("league_id")
+)
+_SELECT_LATEST_AUDIT_LOGS = (
+    select(AuditLog)
+    .where(AuditLog.league_id == bindparam("league_id"))
+    .order_by(AuditLog.timestamp.desc())
 )
-TestingSessionLocal = sessionmaker(
-    bind=engine,
-    autoflush=False,
-    autocommit=False,
-    expire_on_commit=False,
+_SELECT_AUDIT_ACTIONS = select(AuditLog.action).where(AuditLog.league_id == bindparam("league_id"))
+
+_TEST_SETTINGS = Settings(
+    APP_ENV="test",
+    APP_URL="http://localhost:5173",
+    API_URL="http://localhost:8000",
+    DISCORD_CLIENT_ID="client",
+    DISCORD_CLIENT_SECRET="secret",  # noqa: S106
+    DISCORD_REDIRECT_URI="http://localhost:8000/auth/discord/callback",
+    JWT_SECRET="test-secret",  # noqa: S106
+    JWT_ACCESS_TTL_MIN=15,
+    JWT_REFRESH_TTL_DAYS=14,
+    CORS_ORIGINS="http://localhost:5173",
+    REDIS_URL="redis://localhost:6379/0",
 )
 
 
@@ -55,39 +68,12 @@ class StubDiscordClient:
         pass
 
 
-@pytest.fixture(scope="session", autouse=True)
-def setup_database() -> None:
-    for table in Base.metadata.sorted_tables:
-        for column in table.c:
-            default = getattr(column, "server_default", None)
-            if (
-                default is not None
-                and hasattr(default, "arg")
-                and "gen_random_uuid" in str(default.arg)
-            ):
-                column.server_default = None
-    Base.metadata.create_all(bind=engine)
+_STUB_DISCORD_CLIENT = StubDiscordClient()
 
 
 @pytest.fixture(autouse=True)
 def override_dependencies(monkeypatch: pytest.MonkeyPatch) -> Generator[None, None, None]:
-    get_settings.cache_clear()
-
-    test_settings = Settings(
-        APP_ENV="test",
-        APP_URL="http://localhost:5173",
-        API_URL="http://localhost:8000",
-        DISCORD_CLIENT_ID="client",
-        DISCORD_CLIENT_SECRET="secret",  # noqa: S106
-        DISCORD_REDIRECT_URI="http://localhost:8000/auth/discord/callback",
-        JWT_SECRET="test-secret",  # noqa: S106
-        JWT_ACCESS_TTL_MIN=15,
-        JWT_REFRESH_TTL_DAYS=14,
-        CORS_ORIGINS="http://localhost:5173",
-        REDIS_URL="redis://localhost:6379/0",
-    )
-
-    app.dependency_overrides[get_settings] = lambda: test_settings
+    app.dependency_overrides[get_settings] = lambda: _TEST_SETTINGS
 
     def get_test_session() -> Generator[Session, None, None]:
         db = TestingSessionLocal()
@@ -97,33 +83,28 @@ def override_dependencies(monkeypatch: pytest.MonkeyPatch) -> Generator[None, No
             db.close()
 
     app.dependency_overrides[get_session] = get_test_session
-    app.dependency_overrides[provide_discord_client] = lambda: StubDiscordClient()
+    app.dependency_overrides[provide_discord_client] = lambda: _STUB_DISCORD_CLIENT
 
-    yield
+    with isolated_database():
+        yield
 
     app.dependency_overrides.clear()
 
 
-@contextmanager
-def override_user(user: User) -> Generator[None, None, None]:
-    app.dependency_overrides[get_current_user] = lambda: user
-    try:
-        yield
-    finally:
-        app.dependency_overrides.pop(get_current_user, None)
+@pytest.fixture()
+def as_user() -> Generator[Callable[[User], None], None, None]:
+    """Authenticate subsequent requests as the given user."""
 
+    def _set(user: User) -> None:
+        app.dependency_overrides[get_current_user] = lambda: user
 
-@pytest.fixture()
-def client() -> Generator[TestClient, None, None]:
-    with TestClient(app) as test_client:
-        yield test_client
+    yield _set
+    app.dependency_overrides.pop(get_current_user, None)
 
 
 @pytest.fixture()
 def database_session() -> Generator[Session, None, None]:
     session = TestingSessionLocal()
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
     try:
         yield session
     finally:
@@ -142,10 +123,9 @@ def job_spy(monkeypatch: pytest.MonkeyPatch) -> list[tuple[tuple[str, ...], dict
 
 
 def create_user(session: Session, discord_id: str) -> User:
-    user = User(discord_id=discord_id, discord_username=discord_id)
+    user = User(id=uuid4(), discord_id=discord_id, discord_username=discord_id)
     session.add(user)
     session.commit()
-    session.refresh(user)
     return user
 
 
@@ -155,12 +135,11 @@ def create_league(
     owner: User,
     plan: str,
 ) -> League:
-    league = League(name="League", slug=f"league-{uuid4().hex[:8]}", owner_id=owner.id, plan=plan)
-    session.add(league)
-    session.commit()
-    session.refresh(league)
+    league = League(
+        id=uuid4(), name="League", slug=f"league-{unique_suffix()}", owner_id=owner.id, plan=plan
+    )
     membership = Membership(league_id=league.id, user_id=owner.id, role=LeagueRole.OWNER)
-    session.add(membership)
+    session.add_all([league, membership])
     session.commit()
     return league
 
@@ -175,7 +154,6 @@ def add_member(
     membership = Membership(league_id=league.id, user_id=user.id, role=role)
     session.add(membership)
     session.commit()
-    session.refresh(membership)
     return membership
 
 
@@ -183,6 +161,7 @@ class TestDiscordIntegrationRoutes:
     def test_link_discord_creates_integration(
         self,
         client: TestClient,
+        as_user: Callable[[User], None],
         database_session: Session,
     ) -> None:
         owner = create_user(database_session, "owner")
@@ -191,8 +170,8 @@ class TestDiscordIntegrationRoutes:
         add_member(database_session, league=league, user=admin, role=LeagueRole.ADMIN)
 
         payload = {"guild_id": "123", "channel_id": "456"}
-        with override_user(admin):
-            response = client.post(f"/leagues/{league.id}/discord/link", json=payload)
+        as_user(admin)
+        response = client.post(f"/leagues/{league.id}/discord/link", json=payload)
 
         assert response.status_code == HTTPStatus.CREATED, response.text
         data = response.json()
@@ -201,7 +180,7 @@ class TestDiscordIntegrationRoutes:
         assert data["installed_by_user"] == str(admin.id)
 
         integration = database_session.execute(
-            select(DiscordIntegration).where(DiscordIntegration.league_id == league.id)
+            _SELECT_INTEGRATION_BY_LEAGUE, {"league_id": league.id}
         ).scalar_one()
         assert integration.guild_id == "123"
         assert integration.channel_id == "456"
@@ -209,7 +188,7 @@ class TestDiscordIntegrationRoutes:
         assert integration.is_active is True
 
         audit = database_session.execute(
-            select(AuditLog).where(AuditLog.action == "link", AuditLog.league_id == league.id)
+            _SELECT_AUDIT_LOG_BY_ACTION, {"action": "link", "league_id": league.id}
         ).scalar_one()
         assert audit.entity == "discord_integration"
         assert audit.entity_id == str(integration.id)
@@ -217,6 +196,7 @@ class TestDiscordIntegrationRoutes:
     def test_link_requires_admin_role(
         self,
         client: TestClient,
+        as_user: Callable[[User], None],
         database_session: Session,
     ) -> None:
         owner = create_user(database_session, "owner")
@@ -224,11 +204,11 @@ class TestDiscordIntegrationRoutes:
         league = create_league(database_session, owner=owner, plan="PRO")
         add_member(database_session, league=league, user=steward, role=LeagueRole.STEWARD)
 
-        with override_user(steward):
-            response = client.post(
-                f"/leagues/{league.id}/discord/link",
-                json={"guild_id": "123", "channel_id": "456"},
-            )
+        as_user(steward)
+        response = client.post(
+            f"/leagues/{league.id}/discord/link",
+            json={"guild_id": "123", "channel_id": "456"},
+        )
 
         assert response.status_code == HTTPStatus.FORBIDDEN
         payload = response.json()
@@ -237,6 +217,7 @@ class TestDiscordIntegrationRoutes:
     def test_link_requires_pro_plan(
         self,
         client: TestClient,
+        as_user: Callable[[User], None],
         database_session: Session,
     ) -> None:
         owner = create_user(database_session, "owner")
@@ -244,11 +225,11 @@ class TestDiscordIntegrationRoutes:
         league = create_league(database_session, owner=owner, plan="FREE")
         add_member(database_session, league=league, user=admin, role=LeagueRole.ADMIN)
 
-        with override_user(admin):
-            response = client.post(
-                f"/leagues/{league.id}/discord/link",
-                json={"guild_id": "123", "channel_id": "456"},
-            )
+        as_user(admin)
+        response = client.post(
+            f"/leagues/{league.id}/discord/link",
+            json={"guild_id": "123", "channel_id": "456"},
+        )
 
         assert response.status_code == HTTPStatus.FORBIDDEN
         payload = response.json()
@@ -257,6 +238,7 @@ class TestDiscordIntegrationRoutes:
     def test_link_allows_during_plan_grace(
         self,
         client: TestClient,
+        as_user: Callable[[User], None],
         database_session: Session,
     ) -> None:
         owner = create_user(database_session, "owner")
@@ -275,14 +257,15 @@ class TestDiscordIntegrationRoutes:
         database_session.commit()
 
         payload = {"guild_id": "123", "channel_id": "456"}
-        with override_user(admin):
-            response = client.post(f"/leagues/{league.id}/discord/link", json=payload)
+        as_user(admin)
+        response = client.post(f"/leagues/{league.id}/discord/link", json=payload)
 
         assert response.status_code == HTTPStatus.CREATED, response.text
 
     def test_link_requires_plan_after_grace_expires(
         self,
         client: TestClient,
+        as_user: Callable[[User], None],
         database_session: Session,
     ) -> None:
         owner = create_user(database_session, "owner")
@@ -300,19 +283,15 @@ class TestDiscordIntegrationRoutes:
         database_session.commit()
 
         payload = {"guild_id": "123", "channel_id": "456"}
-        with override_user(admin):
-            response = client.post(f"/leagues/{league.id}/discord/link", json=payload)
+        as_user(admin)
+        response = client.post(f"/leagues/{league.id}/discord/link", json=payload)
 
         assert response.status_code == HTTPStatus.FORBIDDEN
         data = response.json()
         assert data["error"]["code"] == "PLAN_LIMIT"
 
         logs = (
-            database_session.execute(
-                select(AuditLog)
-                .where(AuditLog.league_id == league.id)
-                .order_by(AuditLog.timestamp.desc())
-            )
+            database_session.execute(_SELECT_LATEST_AUDIT_LOGS, {"league_id": league.id})
             .scalars()
             .all()
         )
@@ -326,6 +305,7 @@ class TestDiscordIntegrationRoutes:
     def test_test_endpoint_enqueues_job(
         self,
         client: TestClient,
+        as_user: Callable[[User], None],
         database_session: Session,
         job_spy: list[tuple[tuple[str, ...], dict[str, str]]],
     ) -> None:
@@ -334,15 +314,14 @@ class TestDiscordIntegrationRoutes:
         league = create_league(database_session, owner=owner, plan="PRO")
         add_member(database_session, league=league, user=admin, role=LeagueRole.ADMIN)
 
-        with override_user(admin):
-            link_response = client.post(
-                f"/leagues/{league.id}/discord/link",
-                json={"guild_id": "guild", "channel_id": "channel"},
-            )
+        as_user(admin)
+        link_response = client.post(
+            f"/leagues/{league.id}/discord/link",
+            json={"guild_id": "guild", "channel_id": "channel"},
+        )
         assert link_response.status_code == HTTPStatus.CREATED
 
-        with override_user(admin):
-            test_response = client.post(f"/leagues/{league.id}/discord/test")
+        test_response = client.post(f"/leagues/{league.id}/discord/test")
 
         assert test_response.status_code == HTTPStatus.ACCEPTED, test_response.text
         assert test_response.json()["status"] == "queued"
@@ -350,7 +329,7 @@ class TestDiscordIntegrationRoutes:
         assert job_spy == [((str(league.id), "guild", "channel"), {})]
 
         audit_actions = (
-            database_session.execute(select(AuditLog.action).where(AuditLog.league_id == league.id))
+            database_session.execute(_SELECT_AUDIT_ACTIONS, {"league_id": league.id})
             .scalars()
             .all()
         )
@@ -359,6 +338,7 @@ class TestDiscordIntegrationRoutes:
     def test_test_endpoint_requires_active_integration(
         self,
         client: TestClient,
+        as_user: Callable[[User], None],
         database_session: Session,
     ) -> None:
         owner = create_user(database_session, "owner")
@@ -376,8 +356,8 @@ class TestDiscordIntegrationRoutes:
         database_session.add(integration)
         database_session.commit()
 
-        with override_user(admin):
-            response = client.post(f"/leagues/{league.id}/discord/test")
+        as_user(admin)
+        response = client.post(f"/leagues/{league.id}/discord/test")
 
         assert response.status_code == HTTPStatus.CONFLICT
         payload = response.json()
@@ -386,6 +366,7 @@ class TestDiscordIntegrationRoutes:
     def test_test_endpoint_requires_link(
         self,
         client: TestClient,
+        as_user: Callable[[User], None],
         database_session: Session,
     ) -> None:
         owner = create_user(database_session, "owner")
@@ -393,8 +374,8 @@ class TestDiscordIntegrationRoutes:
         league = create_league(database_session, owner=owner, plan="PRO")
         add_member(database_session, league=league, user=admin, role=LeagueRole.ADMIN)
 
-        with override_user(admin):
-            response = client.post(f"/leagues/{league.id}/discord/test")
+        as_user(admin)
+        response = client.post(f"/leagues/{league.id}/discord/test")
 
         assert response.status_code == HTTPStatus.NOT_FOUND
         payload = response.json()
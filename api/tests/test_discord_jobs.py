@@ -1,17 +1,15 @@
 ﻿from __future__ import annotations
 
-import importlib
 from collections.abc import Generator
 from datetime import UTC, datetime
 from uuid import uuid4
 
 import pytest
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 
 import app.db.session as db_session
-from app.db import Base
+from app.core.settings import get_settings
 from app.db.models import (
     AuditLog,
     DiscordIntegration,
@@ -22,56 +20,33 @@ from app.db.models import (
     Result,
     Season,
 )
-
-# Configure shared in-memory database for worker job tests.
-engine = create_engine(
-    "sqlite+pysqlite:///:memory:",
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-    future=True,
-)
-TestingSessionLocal = sessionmaker(
-    bind=engine, autoflush=False, autocommit=False, expire_on_commit=False
-)
-
-for table in Base.metadata.sorted_tables:
-    for column in table.c:
-        default = getattr(column, "server_default", None)
-        if (
-            default is not None
-            and hasattr(default, "arg")
-            and "gen_random_uuid" in str(default.arg)
-        ):
-            column.server_default = None
-
-Base.metadata.create_all(bind=engine)
-
-
-def reset_database() -> None:
-    with engine.begin() as connection:
-        for table in reversed(Base.metadata.sorted_tables):
-            connection.execute(table.delete())
-
-
-def configure_session() -> None:
-    db_session._engine = engine  # type: ignore[attr-defined]
-    db_session.SessionLocal = TestingSessionLocal  # type: ignore[attr-defined]
+from tests._db import TestingSessionLocal, engine, isolated_database, unique_suffix
 
 
 @pytest.fixture(autouse=True)
 def setup_db(monkeypatch: pytest.MonkeyPatch) -> Generator[None, None, None]:
-    configure_session()
+    monkeypatch.setattr(db_session, "_engine", engine)
+    monkeypatch.setattr(db_session, "SessionLocal", TestingSessionLocal)
     import worker.jobs.discord as discord_jobs_module
-    import worker.services.discord as discord_service_module
-
-    importlib.reload(discord_service_module)
-    importlib.reload(discord_jobs_module)
 
+    # The jobs module binds its sessionmaker at import; point it at the test database.
+    monkeypatch.setattr(discord_jobs_module, "SessionLocal", TestingSessionLocal)
     monkeypatch.setenv("DISCORD_BOT_TOKEN", "test-token")
+    get_settings.cache_clear()
+
+    with isolated_database():
+        yield
 
-    yield
+    get_settings.cache_clear()
 
-    reset_database()
+
+@pytest.fixture()
+def session() -> Generator[Session, None, None]:
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
 
 
 class StubNotifier:
@@ -86,10 +61,9 @@ class StubNotifier:
 
 
 def create_league(session: Session, *, plan: str = "PRO") -> League:
-    league = League(name="League", slug=f"league-{uuid4().hex[:8]}", plan=plan)
+    league = League(id=uuid4(), name="League", slug=f"league-{unique_suffix()}", plan=plan)
     session.add(league)
     session.commit()
-    session.refresh(league)
     return league
 
 
@@ -104,12 +78,10 @@ def create_event_with_results(session: Session, league: League) -> Event:
         status=EventStatus.COMPLETED.value,
     )
     driver = Driver(league_id=league.id, display_name="Driver A")
-    session.add_all([season, event, driver])
-    session.commit()
-    session.refresh(event)
+    # Relationships rather than ids, so the unit of work orders the inserts in one flush.
     result = Result(
-        event_id=event.id,
-        driver_id=driver.id,
+        event=event,
+        driver=driver,
         finish_position=1,
         started_position=1,
         status=EventStatus.COMPLETED.value,
@@ -117,18 +89,17 @@ def create_event_with_results(session: Session, league: League) -> Event:
         penalty_points=0,
         total_points=25,
     )
-    session.add(result)
+    session.add_all([season, event, driver, result])
     session.commit()
     return event
 
 
-def test_send_test_message_posts(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_send_test_message_posts(monkeypatch: pytest.MonkeyPatch, session: Session) -> None:
     import worker.jobs.discord as discord_jobs_module
 
     notifier = StubNotifier()
     monkeypatch.setattr(discord_jobs_module, "_get_notifier", lambda: notifier)
 
-    session = TestingSessionLocal()
     league = create_league(session)
     integration = DiscordIntegration(
         league_id=league.id,
@@ -146,7 +117,7 @@ def test_send_test_message_posts(monkeypatch: pytest.MonkeyPatch) -> None:
 
 
 def test_send_test_message_marks_inactive_on_permission_error(
-    monkeypatch: pytest.MonkeyPatch,
+    monkeypatch: pytest.MonkeyPatch, session: Session
 ) -> None:
     import worker.jobs.discord as discord_jobs_module
     from worker.services.discord import DiscordPermissionError
@@ -154,7 +125,6 @@ def test_send_test_message_marks_inactive_on_permission_error(
     notifier = StubNotifier(should_raise=DiscordPermissionError("forbidden"))
     monkeypatch.setattr(discord_jobs_module, "_get_notifier", lambda: notifier)
 
-    session = TestingSessionLocal()
     league = create_league(session)
     integration = DiscordIntegration(
         league_id=league.id,
@@ -169,27 +139,20 @@ def test_send_test_message_marks_inactive_on_permission_error(
     with pytest.raises(DiscordPermissionError):
         discord_jobs_module.send_test_message.fn(str(league.id), "guild", "channel")
 
-    session.close()
-    check_session = TestingSessionLocal()
-    refreshed = check_session.execute(
-        select(DiscordIntegration).where(DiscordIntegration.id == integration.id)
-    ).scalar_one()
-    assert refreshed.is_active is False
+    # The job committed through its own session; reload just the flag it changed.
+    session.expire(integration, ["is_active"])
+    assert integration.is_active is False
 
-    audit = check_session.execute(
-        select(AuditLog).where(AuditLog.league_id == league.id)
-    ).scalar_one()
+    audit = session.execute(select(AuditLog).where(AuditLog.league_id == league.id)).scalar_one()
     assert audit.action == "discord_deactivated"
-    check_session.close()
 
 
-def test_announce_results_sends_embed(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_announce_results_sends_embed(monkeypatch: pytest.MonkeyPatch, session: Session) -> None:
     import worker.jobs.discord as discord_jobs_module
 
     notifier = StubNotifier()
     monkeypatch.setattr(discord_jobs_module, "_get_notifier", lambda: notifier)
 
-    session = TestingSessionLocal()
     league = create_league(session)
     integration = DiscordIntegration(
         league_id=league.id,
@@ -211,14 +174,13 @@ def test_announce_results_sends_embed(monkeypatch: pytest.MonkeyPatch) -> None:
     assert message.embeds and message.embeds[0]["title"].endswith("Results")
 
 
-def test_announce_results_rate_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_announce_results_rate_limit(monkeypatch: pytest.MonkeyPatch, session: Session) -> None:
     import worker.jobs.discord as discord_jobs_module
     from worker.services.discord import DiscordRateLimitError
 
     notifier = StubNotifier(should_raise=DiscordRateLimitError("retry"))
     monkeypatch.setattr(discord_jobs_module, "_get_notifier", lambda: notifier)
 
-    session = TestingSessionLocal()
     league = create_league(session)
     integration = DiscordIntegration(
         league_id=league.id,
@@ -235,7 +197,5 @@ def test_announce_results_rate_limit(monkeypatch: pytest.MonkeyPatch) -> None:
     with pytest.raises(DiscordRateLimitError):
         discord_jobs_module.announce_results.fn(str(league.id), str(event.id))
 
-    refreshed = session.execute(
-        select(DiscordIntegration).where(DiscordIntegration.id == integration.id)
-    ).scalar_one()
-    assert refreshed.is_active is True
+    session.expire(integration, ["is_active"])
+    assert integration.is_active is True
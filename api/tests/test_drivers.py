@@ -2,38 +2,40 @@ from __future__ import annotations
 
 from collections.abc import Generator
 from contextlib import contextmanager
-from datetime import UTC, datetime, timedelta
+from datetime import UTC, datetime
 from http import HTTPStatus
 from uuid import uuid4
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
 
 from app.core.settings import Settings, get_settings
-from app.db import Base
 from app.db.models import BillingAccount, Driver, League, LeagueRole, Membership, Team, User
 from app.db.session import get_session
 from app.dependencies.auth import get_current_user
 from app.main import app
 from app.routes.auth import provide_discord_client
-
-SQLALCHEMY_DATABASE_URL = "sqlite+pysqlite:///:memory:"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    future=True,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(
-    bind=engine,
-    autoflush=False,
-    autocommit=False,
-    expire_on_commit=False,
+from tests._db import TestingSessionLocal, isolated_database
+
+
+_TEST_SETTINGS = Settings(
+    APP_ENV="test",
+    APP_URL="http://localhost:5173",
+    API_URL="http://localhost:8000",
+    DISCORD_CLIENT_ID="client",
+    DISCORD_CLIENT_SECRET="secret",  # noqa: S106
+    DISCORD_REDIRECT_URI="http://localhost:8000/auth/discord/callback",
+    JWT_SECRET="test-secret",  # noqa: S106
+    JWT_ACCESS_TTL_MIN=15,
+    JWT_REFRESH_TTL_DAYS=14,
+    CORS_ORIGINS="http://localhost:5173",
 )
 
+FAR_FUTURE = datetime(2999, 1, 1, tzinfo=UTC)
+FAR_PAST = datetime(2000, 1, 1, tzinfo=UTC)
+
 
 class StubDiscordClient:
     def __init__(self) -> None:  # pragma: no cover
@@ -51,29 +53,12 @@ class StubDiscordClient:
         }
 
 
-@pytest.fixture(scope="session", autouse=True)
-def setup_database() -> None:
-    Base.metadata.create_all(bind=engine)
+_STUB_DISCORD_CLIENT = StubDiscordClient()
 
 
 @pytest.fixture(autouse=True)
 def override_dependencies() -> Generator[None, None, None]:
-    get_settings.cache_clear()
-
-    test_settings = Settings(
-        APP_ENV="test",
-        APP_URL="http://localhost:5173",
-        API_URL="http://localhost:8000",
-        DISCORD_CLIENT_ID="client",
-        DISCORD_CLIENT_SECRET="secret",  # noqa: S106
-        DISCORD_REDIRECT_URI="http://localhost:8000/auth/discord/callback",
-        JWT_SECRET="test-secret",  # noqa: S106
-        JWT_ACCESS_TTL_MIN=15,
-        JWT_REFRESH_TTL_DAYS=14,
-        CORS_ORIGINS="http://localhost:5173",
-    )
-
-    app.dependency_overrides[get_settings] = lambda: test_settings
+    app.dependency_overrides[get_settings] = lambda: _TEST_SETTINGS
 
     def get_test_session() -> Generator[Session, None, None]:
         db = TestingSessionLocal()
@@ -83,9 +68,10 @@ def override_dependencies() -> Generator[None, None, None]:
             db.close()
 
     app.dependency_overrides[get_session] = get_test_session
-    app.dependency_overrides[provide_discord_client] = lambda: StubDiscordClient()
+    app.dependency_overrides[provide_discord_client] = lambda: _STUB_DISCORD_CLIENT
 
-    yield
+    with isolated_database():
+        yield
 
     app.dependency_overrides.clear()
 
@@ -99,27 +85,26 @@ def override_user(user: User) -> Generator[None, None, None]:
         app.dependency_overrides.pop(get_current_user, None)
 
 
-@pytest.fixture()
-def client() -> Generator[TestClient, None, None]:
-    with TestClient(app) as test_client:
-        yield test_client
-
-
 @pytest.fixture()
 def database_session() -> Generator[Session, None, None]:
     session = TestingSessionLocal()
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
     try:
         yield session
     finally:
         session.close()
 
 
-def stub_user(session: Session, discord_id: str) -> User:
-    user = User(discord_id=discord_id, discord_username=discord_id)
-    session.add(user)
-    session.commit()
+def _persist(session: Session, instance: object, *, commit: bool) -> None:
+    # Primary keys are assigned up front, so commit=False can just queue the row and a test
+    # commits its whole arrange phase once.
+    session.add(instance)
+    if commit:
+        session.commit()
+
+
+def stub_user(session: Session, discord_id: str, *, commit: bool = True) -> User:
+    user = User(id=uuid4(), discord_id=discord_id, discord_username=discord_id)
+    _persist(session, user, commit=commit)
     return user
 
 
@@ -128,28 +113,24 @@ def create_league_with_owner(
     owner: User,
     *,
     driver_limit: int = 20,
+    commit: bool = True,
 ) -> League:
     league = League(
+        id=uuid4(),
         name="Test League",
         slug=f"league-{uuid4().hex[:8]}",
         owner_id=owner.id,
         driver_limit=driver_limit,
     )
     session.add(league)
-    session.commit()
-    session.refresh(league)
-
     membership = Membership(league_id=league.id, user_id=owner.id, role=LeagueRole.OWNER)
-    session.add(membership)
-    session.commit()
+    _persist(session, membership, commit=commit)
     return league
 
 
-def create_team(session: Session, league: League, name: str) -> Team:
-    team = Team(league_id=league.id, name=name)
-    session.add(team)
-    session.commit()
-    session.refresh(team)
+def create_team(session: Session, league: League, name: str, *, commit: bool = True) -> Team:
+    team = Team(id=uuid4(), league_id=league.id, name=name)
+    _persist(session, team, commit=commit)
     return team
 
 
@@ -159,8 +140,8 @@ class TestDriverRoutes:
         client: TestClient,
         database_session: Session,
     ) -> None:
-        owner = stub_user(database_session, "owner")
-        league = create_league_with_owner(database_session, owner, driver_limit=10)
+        owner = stub_user(database_session, "owner", commit=False)
+        league = create_league_with_owner(database_session, owner, driver_limit=10, commit=False)
         team = create_team(database_session, league, "Alpha")
 
         payload = {
@@ -182,20 +163,18 @@ class TestDriverRoutes:
         assert data[1]["user_id"] is None
         assert data[1]["discord_id"] is None
 
-        drivers = (
-            database_session.execute(select(Driver).where(Driver.league_id == league.id))
-            .scalars()
-            .all()
-        )
-        assert len(drivers) == 2
+        driver_count = database_session.execute(
+            select(func.count()).select_from(Driver).where(Driver.league_id == league.id)
+        ).scalar_one()
+        assert driver_count == 2
 
     def test_bulk_create_drivers_duplicate_conflict(
         self,
         client: TestClient,
         database_session: Session,
     ) -> None:
-        owner = stub_user(database_session, "owner")
-        league = create_league_with_owner(database_session, owner)
+        owner = stub_user(database_session, "owner", commit=False)
+        league = create_league_with_owner(database_session, owner, commit=False)
         database_session.add(Driver(league_id=league.id, display_name="Driver One"))
         database_session.commit()
 
@@ -211,7 +190,7 @@ class TestDriverRoutes:
         client: TestClient,
         database_session: Session,
     ) -> None:
-        owner = stub_user(database_session, "owner")
+        owner = stub_user(database_session, "owner", commit=False)
         league = create_league_with_owner(database_session, owner, driver_limit=1)
 
         payload = {
@@ -227,50 +206,30 @@ class TestDriverRoutes:
         assert response.status_code == HTTPStatus.PAYMENT_REQUIRED
         assert response.json()["error"]["code"] == "PLAN_LIMIT"
 
-    def test_bulk_create_drivers_allows_during_grace(
-        self, client: TestClient, database_session: Session
-    ) -> None:
-        owner = stub_user(database_session, "owner")
-        league = create_league_with_owner(database_session, owner, driver_limit=1)
-        league.plan = "FREE"
-        database_session.commit()
-
-        billing = BillingAccount(
-            owner_user_id=owner.id,
-            plan="FREE",
-            plan_grace_plan="PRO",
-            plan_grace_expires_at=datetime.now(UTC) + timedelta(days=2),
-        )
-        database_session.add(billing)
-        database_session.commit()
-
-        payload = {
-            "items": [
-                {"display_name": "Driver One"},
-                {"display_name": "Driver Two"},
-            ]
-        }
-
-        with override_user(owner):
-            response = client.post(f"/leagues/{league.id}/drivers", json=payload)
-
-        assert response.status_code == HTTPStatus.CREATED, response.text
-        data = response.json()
-        assert len(data) == 2
-
-    def test_bulk_create_drivers_denies_after_grace(
-        self, client: TestClient, database_session: Session
+    @pytest.mark.parametrize(
+        ("grace_expires_at", "expected_status", "expected_code"),
+        [
+            pytest.param(FAR_FUTURE, HTTPStatus.CREATED, None, id="during-grace"),
+            pytest.param(FAR_PAST, HTTPStatus.PAYMENT_REQUIRED, "PLAN_LIMIT", id="after-grace"),
+        ],
+    )
+    def test_bulk_create_drivers_plan_grace(
+        self,
+        client: TestClient,
+        database_session: Session,
+        grace_expires_at: datetime,
+        expected_status: HTTPStatus,
+        expected_code: str | None,
     ) -> None:
-        owner = stub_user(database_session, "owner")
-        league = create_league_with_owner(database_session, owner, driver_limit=1)
+        owner = stub_user(database_session, "owner", commit=False)
+        league = create_league_with_owner(database_session, owner, driver_limit=1, commit=False)
         league.plan = "FREE"
-        database_session.commit()
 
         billing = BillingAccount(
             owner_user_id=owner.id,
             plan="FREE",
             plan_grace_plan="PRO",
-            plan_grace_expires_at=datetime.now(UTC) - timedelta(days=1),
+            plan_grace_expires_at=grace_expires_at,
         )
         database_session.add(billing)
         database_session.commit()
@@ -285,23 +244,25 @@ class TestDriverRoutes:
         with override_user(owner):
             response = client.post(f"/leagues/{league.id}/drivers", json=payload)
 
-        assert response.status_code == HTTPStatus.PAYMENT_REQUIRED
-        assert response.json()["error"]["code"] == "PLAN_LIMIT"
+        assert response.status_code == expected_status, response.text
+        if expected_code is None:
+            assert len(response.json()) == 2
+        else:
+            assert response.json()["error"]["code"] == expected_code
 
     def test_update_driver_changes_name_and_team(
         self,
         client: TestClient,
         database_session: Session,
     ) -> None:
-        owner = stub_user(database_session, "owner")
-        league = create_league_with_owner(database_session, owner)
-        team_alpha = create_team(database_session, league, "Alpha")
-        team_beta = create_team(database_session, league, "Beta")
+        owner = stub_user(database_session, "owner", commit=False)
+        league = create_league_with_owner(database_session, owner, commit=False)
+        team_alpha = create_team(database_session, league, "Alpha", commit=False)
+        team_beta = create_team(database_session, league, "Beta", commit=False)
 
         driver = Driver(league_id=league.id, display_name="Driver One", team_id=team_alpha.id)
         database_session.add(driver)
         database_session.commit()
-        database_session.refresh(driver)
 
         payload = {"display_name": "Driver Prime", "team_id": str(team_beta.id)}
         with override_user(owner):
@@ -318,13 +279,12 @@ class TestDriverRoutes:
         client: TestClient,
         database_session: Session,
     ) -> None:
-        owner = stub_user(database_session, "owner")
-        league = create_league_with_owner(database_session, owner)
+        owner = stub_user(database_session, "owner", commit=False)
+        league = create_league_with_owner(database_session, owner, commit=False)
         driver1 = Driver(league_id=league.id, display_name="Driver One")
         driver2 = Driver(league_id=league.id, display_name="Driver Two")
         database_session.add_all([driver1, driver2])
         database_session.commit()
-        database_session.refresh(driver2)
 
         with override_user(owner):
             response = client.patch(
@@ -340,9 +300,9 @@ class TestDriverRoutes:
         client: TestClient,
         database_session: Session,
     ) -> None:
-        owner = stub_user(database_session, "owner")
-        steward = stub_user(database_session, "steward")
-        league = create_league_with_owner(database_session, owner)
+        owner = stub_user(database_session, "owner", commit=False)
+        steward = stub_user(database_session, "steward", commit=False)
+        league = create_league_with_owner(database_session, owner, commit=False)
         membership = Membership(
             league_id=league.id,
             user_id=steward.id,
@@ -352,7 +312,6 @@ class TestDriverRoutes:
         driver = Driver(league_id=league.id, display_name="Driver One")
         database_session.add(driver)
         database_session.commit()
-        database_session.refresh(driver)
 
         with override_user(steward):
             response = client.delete(f"/drivers/{driver.id}")
@@ -365,9 +324,9 @@ class TestDriverRoutes:
         client: TestClient,
         database_session: Session,
     ) -> None:
-        owner = stub_user(database_session, "owner")
-        league = create_league_with_owner(database_session, owner)
-        team = create_team(database_session, league, "Alpha")
+        owner = stub_user(database_session, "owner", commit=False)
+        league = create_league_with_owner(database_session, owner, commit=False)
+        team = create_team(database_session, league, "Alpha", commit=False)
         driver = Driver(
             league_id=league.id,
             display_name="Driver One",
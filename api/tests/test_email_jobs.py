@@ -1,48 +1,48 @@
 from __future__ import annotations
 
 import uuid
+from collections.abc import Generator
 
 import pytest
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 
-from app.db import Base
-from app.db.models import AuditLog
+from app.core.settings import Settings
 from app.db import session as db_session
-from app.core.settings import get_settings
+from app.db.models import AuditLog
 from gridboss_email.errors import EmailDeliveryError
 from gridboss_email.models import EmailEnvelope
+from tests._db import TestingSessionLocal, engine, isolated_database
 from worker.jobs import email as email_jobs
 
 
-engine = create_engine(
-    "sqlite+pysqlite:///:memory:",
-    future=True,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(
-    bind=engine,
-    autoflush=False,
-    autocommit=False,
-    expire_on_commit=False,
+_EMAIL_SETTINGS = Settings(
+    EMAIL_FROM_ADDRESS="notifications@example.com",
+    SENDGRID_API_KEY="test-key",
+    SMTP_URL="",
+    EMAIL_ENABLED=True,
 )
 
-db_session._engine = engine  # type: ignore[attr-defined]
-db_session.SessionLocal = TestingSessionLocal  # type: ignore[attr-defined]
-email_jobs.SessionLocal = TestingSessionLocal  # type: ignore[attr-defined]
-
 
 @pytest.fixture(autouse=True)
-def reset_database(monkeypatch: pytest.MonkeyPatch) -> None:
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-    monkeypatch.setenv("EMAIL_FROM_ADDRESS", "notifications@example.com")
-    monkeypatch.setenv("SENDGRID_API_KEY", "test-key")
-    monkeypatch.setenv("SMTP_URL", "")
-    monkeypatch.setenv("EMAIL_ENABLED", "true")
-    get_settings.cache_clear()
+def reset_database(monkeypatch: pytest.MonkeyPatch) -> Generator[None, None, None]:
+    monkeypatch.setattr(db_session, "_engine", engine)
+    monkeypatch.setattr(db_session, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(email_jobs, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(email_jobs, "get_settings", lambda: _EMAIL_SETTINGS)
+
+    with isolated_database():
+        yield
+
+
+# Every test sends the same welcome email. The job copies what it needs out of the payload,
+# so one dict with a fixed message id is built up front and shared.
+_WELCOME_PAYLOAD = EmailEnvelope(
+    message_id=str(uuid.UUID(int=1)),
+    template_id="welcome",
+    recipient="driver@example.com",
+    context={"display_name": "Driver", "app_url": "http://localhost"},
+).to_dict()
 
 
 def _latest_audit() -> AuditLog | None:
@@ -66,14 +66,7 @@ def test_email_job_success(monkeypatch: pytest.MonkeyPatch) -> None:
 
     monkeypatch.setattr(email_jobs, "get_email_provider", lambda **_: StubProvider())
 
-    envelope = EmailEnvelope(
-        message_id=str(uuid.uuid4()),
-        template_id="welcome",
-        recipient="driver@example.com",
-        context={"display_name": "Driver", "app_url": "http://localhost"},
-    )
-
-    email_jobs.send_transactional_email.fn(envelope.to_dict())
+    email_jobs.send_transactional_email.fn(_WELCOME_PAYLOAD)
 
     audit = _latest_audit()
     assert audit is not None
@@ -90,15 +83,8 @@ def test_email_job_delivery_failure(monkeypatch: pytest.MonkeyPatch) -> None:
 
     monkeypatch.setattr(email_jobs, "get_email_provider", lambda **_: FailingProvider())
 
-    envelope = EmailEnvelope(
-        message_id=str(uuid.uuid4()),
-        template_id="welcome",
-        recipient="driver@example.com",
-        context={"display_name": "Driver", "app_url": "http://localhost"},
-    )
-
     with pytest.raises(EmailDeliveryError):
-        email_jobs.send_transactional_email.fn(envelope.to_dict())
+        email_jobs.send_transactional_email.fn(_WELCOME_PAYLOAD)
 
     audit = _latest_audit()
     assert audit is not None
@@ -108,14 +94,7 @@ def test_email_job_delivery_failure(monkeypatch: pytest.MonkeyPatch) -> None:
 def test_email_job_no_provider(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr(email_jobs, "get_email_provider", lambda **_: None)
 
-    envelope = EmailEnvelope(
-        message_id=str(uuid.uuid4()),
-        template_id="welcome",
-        recipient="driver@example.com",
-        context={"display_name": "Driver", "app_url": "http://localhost"},
-    )
-
-    email_jobs.send_transactional_email.fn(envelope.to_dict())
+    email_jobs.send_transactional_email.fn(_WELCOME_PAYLOAD)
 
     audit = _latest_audit()
     assert audit is not None
@@ -1,62 +1,51 @@
 from __future__ import annotations
 
+from collections.abc import Generator
 from types import SimpleNamespace
 
 import pytest
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 
-from app.db import Base
-from app.db.models import AuditLog
+from app.core.settings import Settings
 from app.db import session as db_session
+from app.db.models import AuditLog
 from app.services import email as email_service
-from app.core.settings import get_settings
+from tests._db import TestingSessionLocal, engine, isolated_database
 
 
-engine = create_engine(
-    "sqlite+pysqlite:///:memory:",
-    future=True,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+_EMAIL_DISABLED_SETTINGS = Settings(
+    EMAIL_FROM_ADDRESS="notifications@example.com",
+    EMAIL_ENABLED=False,
+    SENDGRID_API_KEY="",
+    SMTP_URL="",
 )
-TestingSessionLocal = sessionmaker(
-    bind=engine,
-    autoflush=False,
-    autocommit=False,
-    expire_on_commit=False,
+_EMAIL_ENABLED_SETTINGS = _EMAIL_DISABLED_SETTINGS.model_copy(
+    update={"email_enabled": True, "sendgrid_api_key": "test-key"}
 )
 
-db_session._engine = engine  # type: ignore[attr-defined]
-db_session.SessionLocal = TestingSessionLocal  # type: ignore[attr-defined]
-
 
 @pytest.fixture(autouse=True)
-def reset_database(monkeypatch: pytest.MonkeyPatch) -> None:
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-    email_service.email_jobs = None  # type: ignore[assignment]
-    db_session._engine = engine  # type: ignore[attr-defined]
-    db_session.SessionLocal = TestingSessionLocal  # type: ignore[attr-defined]
-    monkeypatch.setenv("EMAIL_FROM_ADDRESS", "notifications@example.com")
-    monkeypatch.setenv("EMAIL_ENABLED", "false")
-    monkeypatch.setenv("SENDGRID_API_KEY", "")
-    monkeypatch.setenv("SMTP_URL", "")
-    get_settings.cache_clear()
+def reset_database(monkeypatch: pytest.MonkeyPatch) -> Generator[None, None, None]:
+    monkeypatch.setattr(email_service, "email_jobs", None)
+    monkeypatch.setattr(db_session, "_engine", engine)
+    monkeypatch.setattr(db_session, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(email_service, "get_settings", lambda: _EMAIL_DISABLED_SETTINGS)
+
+    with isolated_database():
+        yield
 
 
-def _fetch_logs() -> list[AuditLog]:
+def _fetch_actions() -> list[str]:
+    # Only the action column is asserted on, so skip materializing AuditLog instances.
     session: Session = TestingSessionLocal()
     try:
-        return session.execute(select(AuditLog)).scalars().all()
+        return list(session.execute(select(AuditLog.action)).scalars())
     finally:
         session.close()
 
 
-def test_queue_email_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
-    monkeypatch.setenv("EMAIL_ENABLED", "false")
-    get_settings.cache_clear()
-
+def test_queue_email_disabled() -> None:
     called: list[dict[str, object]] = []
     email_service.email_jobs = SimpleNamespace(  # type: ignore[assignment]
         send_transactional_email=SimpleNamespace(send=lambda payload: called.append(payload))
@@ -68,15 +57,13 @@ def test_queue_email_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
         context={"display_name": "Driver", "app_url": "http://localhost"},
     )
 
-    logs = _fetch_logs()
-    assert logs and logs[0].action == "email_disabled"
+    actions = _fetch_actions()
+    assert actions and actions[0] == "email_disabled"
     assert not called
 
 
 def test_queue_email_success(monkeypatch: pytest.MonkeyPatch) -> None:
-    monkeypatch.setenv("EMAIL_ENABLED", "true")
-    monkeypatch.setenv("SENDGRID_API_KEY", "test-key")
-    get_settings.cache_clear()
+    monkeypatch.setattr(email_service, "get_settings", lambda: _EMAIL_ENABLED_SETTINGS)
 
     captured: list[dict[str, object]] = []
 
@@ -90,15 +77,13 @@ def test_queue_email_success(monkeypatch: pytest.MonkeyPatch) -> None:
         context={"display_name": "Driver", "app_url": "http://localhost"},
     )
 
-    logs = _fetch_logs()
-    assert logs and logs[0].action == "email_queued"
+    actions = _fetch_actions()
+    assert actions and actions[0] == "email_queued"
     assert captured and captured[0]["recipient"] == "driver@example.com"
 
 
 def test_queue_email_worker_unavailable(monkeypatch: pytest.MonkeyPatch) -> None:
-    monkeypatch.setenv("EMAIL_ENABLED", "true")
-    monkeypatch.setenv("SENDGRID_API_KEY", "test-key")
-    get_settings.cache_clear()
+    monkeypatch.setattr(email_service, "get_settings", lambda: _EMAIL_ENABLED_SETTINGS)
 
     email_service.email_jobs = None  # type: ignore[assignment]
 
@@ -108,5 +93,5 @@ def test_queue_email_worker_unavailable(monkeypatch: pytest.MonkeyPatch) -> None
         context={"display_name": "Driver", "app_url": "http://localhost"},
     )
 
-    logs = _fetch_logs()
-    assert logs and logs[0].action == "email_worker_unavailable"
+    actions = _fetch_actions()
+    assert actions and actions[0] == "email_worker_unavailable"
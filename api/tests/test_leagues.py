@@ -8,31 +8,16 @@ from uuid import UUID
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 
 from app.core.settings import Settings, get_settings
-from app.db import Base
 from app.db.models import BillingAccount, League, LeagueRole, Membership, Season, User
 from app.db.session import get_session
 from app.dependencies.auth import get_current_user
 from app.main import app
 from app.routes.auth import provide_discord_client
-
-SQLALCHEMY_DATABASE_URL = "sqlite+pysqlite:///:memory:"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    future=True,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(
-    bind=engine,
-    autoflush=False,
-    autocommit=False,
-    expire_on_commit=False,
-)
+from tests._db import TestingSessionLocal, isolated_database
 
 
 class StubDiscordClient:
@@ -51,29 +36,26 @@ class StubDiscordClient:
         }
 
 
-@pytest.fixture(scope="session", autouse=True)
-def setup_database() -> None:
-    Base.metadata.create_all(bind=engine)
+_STUB_DISCORD_CLIENT = StubDiscordClient()
+
+
+_TEST_SETTINGS = Settings(
+    APP_ENV="test",
+    APP_URL="http://localhost:5173",
+    API_URL="http://localhost:8000",
+    DISCORD_CLIENT_ID="client",
+    DISCORD_CLIENT_SECRET="secret",  # noqa: S106
+    DISCORD_REDIRECT_URI="http://localhost:8000/auth/discord/callback",
+    JWT_SECRET="test-secret",  # noqa: S106
+    JWT_ACCESS_TTL_MIN=15,
+    JWT_REFRESH_TTL_DAYS=14,
+    CORS_ORIGINS="http://localhost:5173",
+)
 
 
 @pytest.fixture(autouse=True)
 def override_dependencies() -> Generator[None, None, None]:
-    get_settings.cache_clear()
-
-    test_settings = Settings(
-        APP_ENV="test",
-        APP_URL="http://localhost:5173",
-        API_URL="http://localhost:8000",
-        DISCORD_CLIENT_ID="client",
-        DISCORD_CLIENT_SECRET="secret",  # noqa: S106
-        DISCORD_REDIRECT_URI="http://localhost:8000/auth/discord/callback",
-        JWT_SECRET="test-secret",  # noqa: S106
-        JWT_ACCESS_TTL_MIN=15,
-        JWT_REFRESH_TTL_DAYS=14,
-        CORS_ORIGINS="http://localhost:5173",
-    )
-
-    app.dependency_overrides[get_settings] = lambda: test_settings
+    app.dependency_overrides[get_settings] = lambda: _TEST_SETTINGS
 
     def get_test_session() -> Generator[Session, None, None]:
         db = TestingSessionLocal()
@@ -83,9 +65,10 @@ def override_dependencies() -> Generator[None, None, None]:
             db.close()
 
     app.dependency_overrides[get_session] = get_test_session
-    app.dependency_overrides[provide_discord_client] = lambda: StubDiscordClient()
+    app.dependency_overrides[provide_discord_client] = lambda: _STUB_DISCORD_CLIENT
 
-    yield
+    with isolated_database():
+        yield
 
     app.dependency_overrides.clear()
 
@@ -99,17 +82,9 @@ def override_user(user: User) -> Generator[None, None, None]:
         app.dependency_overrides.pop(get_current_user, None)
 
 
-@pytest.fixture()
-def client() -> Generator[TestClient, None, None]:
-    with TestClient(app) as test_client:
-        yield test_client
-
-
 @pytest.fixture()
 def database_session() -> Generator[Session, None, None]:
     session = TestingSessionLocal()
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
     try:
         yield session
     finally:
@@ -27,18 +27,6 @@ engine = create_engine(
     poolclass=StaticPool,
 )
 
-# SQLite does not understand postgres-specific defaults; drop them for tests
-for table in Base.metadata.sorted_tables:
-    for column in table.c:
-        default = getattr(column, "server_default", None)
-        if (
-            default is not None
-            and hasattr(default, "arg")
-            and default.arg is not None
-            and "gen_random_uuid" in str(default.arg)
-        ):
-            column.server_default = None
-
 TestingSessionLocal = sessionmaker(
     bind=engine,
     autoflush=False,
@@ -35,13 +35,11 @@ if "dramatiq" not in sys.modules:
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 from worker.jobs import standings as standings_jobs
 
 from app.core.settings import Settings, get_settings
-from app.db import Base
 from app.db.models import (
     Driver,
     Event,
@@ -61,20 +59,7 @@ from app.dependencies.auth import get_current_user
 from app.main import app
 from app.routes.auth import provide_discord_client
 from app.services import standings as standings_service
-
-SQLALCHEMY_DATABASE_URL = "sqlite+pysqlite:///:memory:"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    future=True,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(
-    bind=engine,
-    autoflush=False,
-    autocommit=False,
-    expire_on_commit=False,
-)
+from tests._db import TestingSessionLocal, isolated_database
 
 
 class StubDiscordClient:
@@ -93,40 +78,29 @@ class StubDiscordClient:
         }
 
 
-@pytest.fixture(scope="session", autouse=True)
-def setup_database() -> None:
-    for table in Base.metadata.sorted_tables:
-        for column in table.c:
-            default = getattr(column, "server_default", None)
-            if (
-                default is not None
-                and hasattr(default, "arg")
-                and "gen_random_uuid" in str(default.arg)
-            ):
-                column.server_default = None
-    Base.metadata.create_all(bind=engine)
+_STUB_DISCORD_CLIENT = StubDiscordClient()
+
+
+_TEST_SETTINGS = Settings(
+    APP_ENV="test",
+    APP_URL="http://localhost:5173",
+    API_URL="http://localhost:8000",
+    DISCORD_CLIENT_ID="client",
+    DISCORD_CLIENT_SECRET="secret",  # noqa: S106
+    DISCORD_REDIRECT_URI="http://localhost:8000/auth/discord/callback",
+    JWT_SECRET="test-secret",  # noqa: S106
+    JWT_ACCESS_TTL_MIN=15,
+    JWT_REFRESH_TTL_DAYS=14,
+    CORS_ORIGINS="http://localhost:5173",
+    REDIS_URL="redis://localhost:6379/0",
+)
 
 
 @pytest.fixture(autouse=True)
 def override_dependencies(monkeypatch: pytest.MonkeyPatch) -> Generator[None, None, None]:
-    get_settings.cache_clear()
     standings_service._cache_instance = None
 
-    test_settings = Settings(
-        APP_ENV="test",
-        APP_URL="http://localhost:5173",
-        API_URL="http://localhost:8000",
-        DISCORD_CLIENT_ID="client",
-        DISCORD_CLIENT_SECRET="secret",  # noqa: S106
-        DISCORD_REDIRECT_URI="http://localhost:8000/auth/discord/callback",
-        JWT_SECRET="test-secret",  # noqa: S106
-        JWT_ACCESS_TTL_MIN=15,
-        JWT_REFRESH_TTL_DAYS=14,
-        CORS_ORIGINS="http://localhost:5173",
-        REDIS_URL="redis://localhost:6379/0",
-    )
-
-    app.dependency_overrides[get_settings] = lambda: test_settings
+    app.dependency_overrides[get_settings] = lambda: _TEST_SETTINGS
 
     def get_test_session() -> Generator[Session, None, None]:
         db = TestingSessionLocal()
@@ -136,10 +110,11 @@ def override_dependencies(monkeypatch: pytest.MonkeyPatch) -> Generator[None, No
             db.close()
 
     app.dependency_overrides[get_session] = get_test_session
-    app.dependency_overrides[provide_discord_client] = lambda: StubDiscordClient()
+    app.dependency_overrides[provide_discord_client] = lambda: _STUB_DISCORD_CLIENT
     monkeypatch.setattr(standings_jobs.recompute_standings, "send", lambda *args, **kwargs: None)
 
-    yield
+    with isolated_database():
+        yield
 
     app.dependency_overrides.clear()
     standings_service._cache_instance = None
@@ -154,17 +129,9 @@ def override_user(user: User) -> Generator[None, None, None]:
         app.dependency_overrides.pop(get_current_user, None)
 
 
-@pytest.fixture()
-def client() -> Generator[TestClient, None, None]:
-    with TestClient(app) as test_client:
-        yield test_client
-
-
 @pytest.fixture()
 def database_session() -> Generator[Session, None, None]:
     session = TestingSessionLocal()
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
     try:
         yield session
     finally:
@@ -339,6 +306,59 @@ class TestStandingsRoutes:
         assert default_response.status_code == HTTPStatus.OK
         assert default_response.json()["items"] == items
 
+    def test_standings_ignore_results_from_uncompleted_events(
+        self,
+        client: TestClient,
+        database_session: Session,
+    ) -> None:
+        owner = stub_user(database_session, "owner")
+        league, season = create_league_with_owner(database_session, owner)
+        driver = create_driver(database_session, league, display_name="Driver A")
+
+        completed = create_event(database_session, league, season, name="Race 1")
+        completed.status = EventStatus.COMPLETED.value
+        scheduled = create_event(database_session, league, season, name="Race 2")
+        database_session.commit()
+
+        record_result(
+            database_session, event=completed, driver=driver, finish_position=3, total_points=15
+        )
+        record_result(
+            database_session, event=scheduled, driver=driver, finish_position=1, total_points=25
+        )
+
+        with override_user(owner):
+            response = client.get(
+                f"/leagues/{league.id}/standings",
+                params={"seasonId": str(season.id)},
+            )
+        assert response.status_code == HTTPStatus.OK, response.text
+        [item] = response.json()["items"]
+        assert item["points"] == 15
+        assert item["wins"] == 0
+        assert item["best_finish"] == 3
+
+    def test_calculate_standings_pages_in_sql(self, database_session: Session) -> None:
+        owner = stub_user(database_session, "owner")
+        league, season = create_league_with_owner(database_session, owner)
+        event = create_event(database_session, league, season, name="Race 1")
+        event.status = EventStatus.COMPLETED.value
+        database_session.commit()
+        for position, name in enumerate(["Driver A", "Driver B", "Driver C"], start=1):
+            driver = create_driver(database_session, league, display_name=name)
+            record_result(
+                database_session,
+                event=event,
+                driver=driver,
+                finish_position=position,
+                total_points=30 - position,
+            )
+
+        page = standings_service.calculate_standings(
+            database_session, league_id=league.id, season_id=season.id, limit=1, offset=1
+        )
+        assert [row.display_name for row in page] == ["Driver B"]
+
     def test_standings_requires_membership(
         self,
         client: TestClient,
@@ -476,3 +496,96 @@ class TestStandingsRoutes:
         assert refreshed_items[0]["points"] == 30
         assert refreshed_items[1]["driver_id"] == str(driver_a.id)
         assert refreshed_items[1]["points"] == 10
+
+    def test_standings_cache_invalidated_on_driver_rename(
+        self,
+        client: TestClient,
+        database_session: Session,
+    ) -> None:
+        owner = stub_user(database_session, "owner")
+        league, season = create_league_with_owner(database_session, owner)
+        driver = create_driver(database_session, league, display_name="Driver A")
+
+        with override_user(owner):
+            first = client.get(
+                f"/leagues/{league.id}/standings",
+                params={"seasonId": str(season.id)},
+            )
+            assert first.status_code == HTTPStatus.OK
+            assert first.json()["items"][0]["display_name"] == "Driver A"
+
+            rename = client.patch(f"/drivers/{driver.id}", json={"display_name": "Driver Z"})
+            assert rename.status_code == HTTPStatus.OK, rename.text
+
+            refreshed = client.get(
+                f"/leagues/{league.id}/standings",
+                params={"seasonId": str(season.id)},
+            )
+        assert refreshed.status_code == HTTPStatus.OK
+        assert refreshed.json()["items"][0]["display_name"] == "Driver Z"
+
+
+class TestStandingsCache:
+    def test_bulk_operations_round_trip(self) -> None:
+        cache = standings_service.StandingsCache(
+            standings_service.StandingsCacheConfig(redis_url="redis://localhost:6379/0")
+        )
+        league_id = uuid4()
+        season_id = uuid4()
+        cache.set_many(
+            {
+                (league_id, season_id): {"items": [1]},
+                (league_id, None): {"items": [2]},
+            }
+        )
+
+        cached = cache.get_many([(league_id, season_id), (league_id, None), (uuid4(), None)])
+        assert list(cached.values()) == [{"items": [1]}, {"items": [2]}, None]
+
+        cache.invalidate_many([(league_id, season_id), (league_id, None)])
+        assert cache.get_many([(league_id, season_id), (league_id, None)]) == {
+            (league_id, season_id): None,
+            (league_id, None): None,
+        }
+
+    def test_unreachable_redis_backs_off_to_memory_store(self) -> None:
+        cache = standings_service.StandingsCache(
+            standings_service.StandingsCacheConfig(redis_url="redis://localhost:1/0")
+        )
+        league_id = uuid4()
+
+        cache.set(league_id=league_id, season_id=None, payload={"items": [1]})
+        cache._l1.clear()
+
+        assert cache._redis() is None
+        assert cache.get(league_id=league_id, season_id=None) == {"items": [1]}
+
+    def test_fill_computed_before_invalidation_is_not_stored(self) -> None:
+        cache = standings_service.StandingsCache(
+            standings_service.StandingsCacheConfig(redis_url="redis://localhost:1/0")
+        )
+        league_id = uuid4()
+
+        # A request misses and starts recomputing; a results write then invalidates.
+        stale_generation = cache.generation(league_id=league_id, season_id=None)
+        cache.invalidate(league_id=league_id, season_id=None)
+        cache.set(
+            league_id=league_id,
+            season_id=None,
+            payload={"items": ["stale"]},
+            generation=stale_generation,
+        )
+        assert cache.get(league_id=league_id, season_id=None) is None
+
+        # Fills computed after the invalidation are stored, and the newest one wins.
+        fresh_generation = cache.generation(league_id=league_id, season_id=None)
+        for items in ([1], [2]):
+            cache.set(
+                league_id=league_id,
+                season_id=None,
+                payload={"items": items},
+                generation=fresh_generation,
+            )
+        cache._l1.clear()
+
+        assert cache.get(league_id=league_id, season_id=None) == {"items": [2]}
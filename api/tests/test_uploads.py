@@ -17,6 +17,7 @@ client = TestClient(app)
 def _reset_settings() -> None:
     get_settings.cache_clear()
     storage._cached_client.cache_clear()  # type: ignore[attr-defined]
+    storage._last_client = None
 
 
 @mock_aws
@@ -160,6 +161,17 @@ def test_complete_avatar_strips_exif(monkeypatch) -> None:
     sanitized_image = Image.open(BytesIO(sanitized))
     assert not bool(sanitized_image.getexif())
 
+    def _fail_strip(**_: object) -> int:
+        raise AssertionError("sanitized objects should not be downloaded again")
+
+    monkeypatch.setattr(storage, "_strip_exif_in_place", _fail_strip)
+    repeat = client.post(
+        "/uploads/complete",
+        json={"kind": "avatar", "objectKey": object_key},
+    )
+    assert repeat.status_code == 200
+    assert repeat.json()["contentLength"] == len(sanitized)
+
 
 @mock_aws
 def test_sign_download_requires_matching_prefix(monkeypatch) -> None:
@@ -272,3 +284,69 @@ def test_complete_avatar_rejects_large_file(monkeypatch) -> None:
     assert response.status_code == 413
     body = response.json()
     assert body["detail"]["error"] == "object_too_large"
+
+
+@mock_aws
+def test_complete_avatar_strips_webp_exif_without_reencoding(monkeypatch) -> None:
+    monkeypatch.setenv("APP_ENV", "development")
+    monkeypatch.setenv("S3_ENABLED", "true")
+    monkeypatch.setenv("S3_BUCKET", "gridboss-test")
+    monkeypatch.setenv("S3_REGION", "us-east-1")
+    monkeypatch.setenv("S3_ENDPOINT", "https://s3.amazonaws.com")
+    monkeypatch.setenv("S3_ACCESS_KEY", "test-access")
+    monkeypatch.setenv("S3_SECRET_KEY", "test-secret")
+    _reset_settings()
+
+    s3 = boto3.client(
+        "s3",
+        region_name="us-east-1",
+        aws_access_key_id="test-access",
+        aws_secret_access_key="test-secret",
+    )
+    s3.create_bucket(Bucket="gridboss-test")
+
+    image = Image.new("RGB", (10, 10), color=(0, 128, 128))
+    exif = Image.Exif()
+    exif[0x9003] = "2024:01:01 00:00:00"
+    buffer = BytesIO()
+    image.save(buffer, format="WEBP", lossless=True, exif=exif)
+    raw_bytes = buffer.getvalue()
+
+    object_key = "avatars/test-avatar.webp"
+    s3.put_object(
+        Bucket="gridboss-test",
+        Key=object_key,
+        Body=raw_bytes,
+        ContentType="image/webp",
+    )
+
+    response = client.post(
+        "/uploads/complete",
+        json={"kind": "avatar", "objectKey": object_key},
+    )
+
+    assert response.status_code == 200
+    sanitized = s3.get_object(Bucket="gridboss-test", Key=object_key)["Body"].read()
+    assert response.json()["contentLength"] == len(sanitized) < len(raw_bytes)
+    sanitized_image = Image.open(BytesIO(sanitized))
+    assert not bool(sanitized_image.getexif())
+    assert sanitized_image.tobytes() == image.tobytes()
+
+
+def test_strip_jpeg_metadata_drops_comments_and_trailing_bytes() -> None:
+    image = Image.new("RGB", (32, 32), color=(200, 40, 40))
+    exif = Image.Exif()
+    exif[0x9003] = "2024:01:01 00:00:00"
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", exif=exif, comment=b"user comment", progressive=True)
+    raw_bytes = buffer.getvalue() + b"appended payload"
+
+    stripped = storage._strip_jpeg_metadata(raw_bytes)
+
+    assert stripped is not None
+    assert b"user comment" not in stripped
+    assert stripped.endswith(b"\xff\xd9")
+    assert b"appended payload" not in stripped
+    stripped_image = Image.open(BytesIO(stripped))
+    assert not bool(stripped_image.getexif())
+    assert stripped_image.tobytes() == Image.open(BytesIO(raw_bytes)).tobytes()
@@ -39,16 +39,6 @@ TestingSessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
-for table in Base.metadata.sorted_tables:
-    for column in table.c:
-        default = getattr(column, "server_default", None)
-        if (
-            default is not None
-            and hasattr(default, "arg")
-            and "gen_random_uuid" in str(default.arg)
-        ):
-            column.server_default = None
-
 Base.metadata.create_all(bind=engine)
 
 